@@ -1,11 +1,13 @@
 import streamlit as st
 import pandas as pd
-import json
-import plotly.express as px
+from utils.assets import require_assets
+from utils.figure_cache import cached_figure
+from utils.geometry import HOME_MAP_CENTER, HOME_MAP_ZOOM, TRICITY_GEOMETRY_PATH, get_tricity_geometry
+from utils.warmup import start_warmup
 
 def load_data() -> tuple:
     """Load geojson of map boundaries and create datapoints for plotting"""
-    map = json.load(open("assets/geojson/tricity.geojson", "r"))
+    map = get_tricity_geometry()
     df = {
         "City": ["Chandigarh", "Panchkula", "Mohali (incl. adj areas)"],
         "id": ["Chandigarh", "Panchkula", "Mohali"]
@@ -14,16 +16,42 @@ def load_data() -> tuple:
     return map, df
 
 
-def main():
-    # load map data
-    tricity_map = load_data()[0]
-    tricity_df = load_data()[1]
+def plotMap():
+    """Choropleth of Tricity city boundaries"""
+    # deferred, importing plotly.express takes longer than the rest of the page run
+    import plotly.express as px
+
+    tricity_map, tricity_df = load_data()
+    fig = px.choropleth_mapbox(tricity_df, locations="id", geojson=tricity_map, color="City",
+                            mapbox_style="open-street-map", center=HOME_MAP_CENTER,
+                            featureidkey="properties.Name", width=700, height=700,
+                            zoom=HOME_MAP_ZOOM, opacity=0.5, color_discrete_sequence=["red", "yellow", "blue"])
+    
+    fig.update_traces(
+        marker_line_width=2,
+        marker_line_color='black'
+    )
+
+    fig.update_layout(
+        legend=dict(
+            orientation="h", yanchor="bottom", y=1,
+            xanchor="center", x=0.5
+        )
+    )
+    return fig
+
 
+def main():
     st.set_page_config(
         page_title="Chandigarh Tricity Real Estate App",
         page_icon="🏠"
     )
 
+    require_assets((TRICITY_GEOMETRY_PATH,))
+
+    # preload model and assets of all pages in background, once per process
+    start_warmup()
+
     # Page Heading
     st.markdown(
         "<h1 style='text-align: center;'>Chandigarh Tricity Real Estate App</h1>",
@@ -42,23 +70,9 @@ def main():
         "<h3 style='text-align: center;'>Map of Tricity</h3>",
         unsafe_allow_html=True
     )
-    
-    fig = px.choropleth_mapbox(tricity_df, locations="id", geojson=tricity_map, color="City",
-                            mapbox_style="open-street-map", center={"lat": 30.689281, "lon": 76.786950},
-                            featureidkey="properties.Name", width=700, height=700,
-                            zoom=10.25, opacity=0.5, color_discrete_sequence=["red", "yellow", "blue"])
-    
-    fig.update_traces(
-        marker_line_width=2,
-        marker_line_color='black'
-    )
 
-    fig.update_layout(
-        legend=dict(
-            orientation="h", yanchor="bottom", y=1,
-            xanchor="center", x=0.5
-        )
-    )
+    # map only depends on boundary geometry, so it is built once per geometry version
+    fig = cached_figure("home_map", (), (TRICITY_GEOMETRY_PATH,), plotMap)
 
     st.plotly_chart(fig, use_container_width=True)
 
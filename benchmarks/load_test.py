@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import gc
+import json
+import os
+import random
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from benchmarks.run import PAGES, load_params
+from utils.instrumentation import memory_snapshot
+from utils.logger import get_logger
+
+logger = get_logger('load_test')
+
+# Widgets a visitor changes and buttons clicked with `click_probability`
+INTERACTIVE_LABELS = {'City', 'Sector', 'Property Type'}
+BUTTONS = ['Predict']
+
+
+@contextlib.contextmanager
+def shared_runtime():
+    """Let AppTest instances run concurrently in one process.
+
+    AppTest.run installs a mock Runtime and patches the appTest config option
+    for every run and resets both afterwards, which breaks runs of other
+    sessions still in progress. Here both are set up once for the whole load
+    test, like one server process whose caches (including compiled page
+    scripts) are shared by all sessions.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    class SessionRuntime(Runtime):
+        """Per run assignments of _instance by AppTest land here instead of Runtime"""
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    script_cache = ScriptCache()
+    get_option = config.get_option
+
+    def app_test_option(key: str):
+        return True if key == "global.appTest" else get_option(key)
+
+    saved_instance = Runtime._instance
+    Runtime._instance = runtime
+    try:
+        with patch.object(app_test, "Runtime", SessionRuntime), \
+                patch.object(app_test, "ScriptCache", lambda: script_cache), \
+                patch.object(local_script_runner, "ScriptCache", lambda: script_cache), \
+                patch.object(app_test, "patch_config_options", lambda overrides: contextlib.nullcontext()), \
+                patch.object(config, "get_option", app_test_option):
+            yield
+    finally:
+        Runtime._instance = saved_instance
+
+
+class Session:
+    """One simulated visitor with its own session per page"""
+
+    def __init__(self, session_id: int, seed: int, click_probability: float, think_time: float):
+        self.rng = random.Random(seed + session_id)
+        self.click_probability = click_probability
+        self.think_time = think_time
+        self.apps = {}
+        self.reruns = []
+        self.errors = 0
+
+    def rerun(self, page: str, action) -> None:
+        """Run action (returns the AppTest after its rerun) and record latency and errors"""
+        start = time.perf_counter()
+        try:
+            app = action()
+            if app.exception:
+                self.errors += 1
+                logger.error("%s raised %s", page, [e.message for e in app.exception])
+        except Exception as e:
+            self.errors += 1
+            logger.error("Rerun of %s failed: %s", page, e)
+        self.reruns.append((page, time.perf_counter() - start))
+
+    def step(self) -> None:
+        """Open a random page, or change a filter or click a button on it"""
+        from streamlit.testing.v1 import AppTest
+
+        page = self.rng.choice(PAGES)
+        app = self.apps.get(page)
+        if app is None:
+            app = self.apps[page] = AppTest.from_file(page, default_timeout=120)
+            self.rerun(page, app.run)
+            return
+
+        buttons = [button for button in app.button if button.label in BUTTONS]
+        if buttons and self.rng.random() < self.click_probability:
+            self.rerun(page, self.rng.choice(buttons).click().run)
+            return
+        widgets = [widget for widget in app.selectbox if widget.label in INTERACTIVE_LABELS and widget.options]
+        if widgets:
+            widget = self.rng.choice(widgets)
+            self.rerun(page, widget.set_value(self.rng.choice(widget.options)).run)
+        else:
+            self.rerun(page, app.run)
+
+    def run(self, steps: int) -> None:
+        for _ in range(steps):
+            self.step()
+            if self.think_time:
+                time.sleep(self.rng.uniform(0, self.think_time))
+
+
+def percentiles(seconds: list) -> dict:
+    """Percentiles of rerun latency in ms"""
+    times = np.array(seconds) * 1e3
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "mean_ms": times.mean()}
+
+
+def run_level(concurrency: int, params: dict) -> dict:
+    """Run `concurrency` sessions in parallel threads, latency, throughput and memory of the level"""
+    gc.collect()
+    resident_before = memory_snapshot().get("resident_bytes", 0)
+    sessions = [Session(i, params['seed'], params['click_probability'], params['think_time'])
+                for i in range(concurrency)]
+    threads = [threading.Thread(target=session.run, args=(params['steps'],), name=f"session-{i}")
+               for i, session in enumerate(sessions)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    # sessions are still alive, growth is what they hold on top of the shared assets
+    resident_growth = memory_snapshot().get("resident_bytes", 0) - resident_before
+    reruns = [rerun for session in sessions for rerun in session.reruns]
+    pages = {os.path.basename(page): percentiles([seconds for name, seconds in reruns if name == page])
+             for page in PAGES if any(name == page for name, _ in reruns)}
+    result = {
+        "sessions": concurrency,
+        "reruns": len(reruns),
+        "errors": sum(session.errors for session in sessions),
+        "wall_time_s": wall_time,
+        "reruns_per_sec": len(reruns) / wall_time,
+        "latency": percentiles([seconds for _, seconds in reruns]),
+        "pages": pages,
+        "resident_growth_bytes": resident_growth,
+        "bytes_per_session": resident_growth / concurrency,
+    }
+    logger.debug("%d sessions: %.1f reruns/sec, p95 %.0f ms, %d errors", concurrency,
+                 result["reruns_per_sec"], result["latency"]["p95_ms"], result["errors"])
+    return result
+
+
+def run(params: dict) -> dict:
+    """Warm up the process with one session, then run every concurrency level"""
+    from streamlit.testing.v1 import AppTest
+
+    with shared_runtime():
+        # first run of every page loads model and assets, kept out of the measured levels
+        warm_up = Session(-1, params['seed'], 0.0, 0.0)
+        for page in PAGES:
+            warm_up.rerun(page, AppTest.from_file(page, default_timeout=300).run)
+        return {str(level): run_level(level, params) for level in params['concurrency']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the pages with concurrent simulated sessions")
+    parser.add_argument("--concurrency", nargs="+", type=int, help="Session counts to run, overrides params.yaml")
+    parser.add_argument("--steps", type=int, help="Interactions per session, overrides params.yaml")
+    parser.add_argument("--output", default="reports/load_test.json")
+    args = parser.parse_args()
+
+    try:
+        params = load_params('params.yaml')['load_test']
+        if args.concurrency:
+            params['concurrency'] = args.concurrency
+        if args.steps:
+            params['steps'] = args.steps
+        results = run(params)
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+        logger.debug("Load test results saved at %s", args.output)
+    except Exception as e:
+        logger.error("Failed to run load test: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from benchmarks.synthetic import make_raw, write_raw
+from utils.assets import LOADERS, load_pickle
+from utils.features import FEATURE_COLUMNS, TARGET_COLUMN
+from utils.logger import get_logger
+from utils.serving_model import PICKLE_FILE, load_serving_model
+
+logger = get_logger('benchmarks')
+
+PAGES = ["Home.py", "pages/1_Price_Predictor.py",
+         "pages/2_Geospatial_Price_Insights.py", "pages/3_Analytical_Module.py"]
+# What a page run needs from the repo, linked into the app copies with scaled assets
+APP_FILES = ["Home.py", "pages", "utils", "src", os.path.join("assets", "models"), os.path.join("assets", "geojson")]
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        return params
+    except Exception as e:
+        logger.error("Unexpected error occured while loading params file: %s", e)
+        raise
+
+
+def latency(fn, repeats: int) -> dict:
+    """Call fn(i) repeats times, percentiles of call time in ms"""
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(i)
+        times[i] = time.perf_counter() - start
+    p50, p95, p99 = np.percentile(times * 1e3, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "mean_ms": times.mean() * 1e3}
+
+
+def bench_predict(model_dir: str, X: pd.DataFrame, repeats: int, batch_sizes: list) -> dict:
+    """Single row and batched predict latency of serving model and pickled pipeline, the last batch is all of X"""
+    model = load_serving_model(model_dir)
+    pipeline = load_pickle(os.path.join(model_dir, PICKLE_FILE))
+    rows = list(X.itertuples(index=False, name=None))
+    n = len(rows)
+
+    results = {"single_row_pipeline": latency(lambda i: pipeline.predict(X.iloc[[i % n]]), repeats)}
+    if hasattr(model, 'predict_one'):
+        results["single_row_fast"] = latency(lambda i: model.predict_one(rows[i % n]), repeats)
+    for batch_size in [size for size in batch_sizes if size < n] + [n]:
+        batch = X.iloc[:batch_size]
+        results[f"batch_{batch_size}"] = latency(lambda i: model.predict(batch), max(1, repeats // 10))
+    logger.debug("Predict latency measured")
+    return results
+
+
+def bench_assets(asset_dir: str) -> dict:
+    """Load time of every pickle and Arrow file in asset_dir in ms, best of 3 reads"""
+    results = {}
+    paths = glob.glob(os.path.join(asset_dir, "*.pkl")) + glob.glob(os.path.join(asset_dir, "*.arrow"))
+    for path in sorted(paths):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            LOADERS[os.path.splitext(path)[1]](path)
+            times.append(time.perf_counter() - start)
+        results[os.path.basename(path)] = {"load_ms": min(times) * 1e3, "bytes": os.path.getsize(path)}
+    logger.debug("Asset load times measured for %d files", len(results))
+    return results
+
+
+# Run in a fresh interpreter: loads files given as arguments and prints memory
+# growth, private is resident memory not backed by files (not shareable)
+RSS_WARMUP = """
+import pandas as pd, pyarrow as pa
+pa.Table.from_pandas(pd.DataFrame({'a': pd.Categorical(['x']), 'b': [1.0], 'c': ['y']})).to_pandas(split_blocks=True)
+"""
+RSS_SCRIPT = """
+import json, os, sys
+from utils.assets import LOADERS
+def statm():
+    with open('/proc/self/statm') as file:
+        size, resident, shared = (int(v) * os.sysconf('SC_PAGE_SIZE') for v in file.read().split()[:3])
+    return resident, resident - shared
+before = statm()
+data = [LOADERS[os.path.splitext(path)[1]](path) for path in sys.argv[1:]]
+after = statm()
+print(json.dumps({'resident_bytes': after[0] - before[0], 'private_bytes': after[1] - before[1]}))
+"""
+
+
+def bench_asset_memory(asset_dir: str) -> dict:
+    """Resident and private memory one process gains loading the tabular assets, pickle vs Arrow"""
+    from src.features.build_arrow_assets import ARROW_ASSETS
+
+    results = {}
+    for suffix in [".pkl", ".arrow"]:
+        paths = [os.path.join(asset_dir, name + suffix) for name in ARROW_ASSETS]
+        if not all(os.path.exists(path) for path in paths):
+            continue
+        # runs the pandas/Arrow conversion code once first so only the data is measured
+        script = RSS_WARMUP + RSS_SCRIPT
+        output = subprocess.run([sys.executable, "-c", script, *paths], check=True,
+                                capture_output=True, text=True).stdout
+        results[suffix.lstrip(".")] = json.loads(output.strip().splitlines()[-1])
+    logger.debug("Asset memory measured for %s", ", ".join(results))
+    return results
+
+
+def bench_preprocessing(raw: pd.DataFrame, scales: list, work_dir: str, seed: int) -> dict:
+    """Rows/sec of streaming preprocessing on synthetic raw data of every scale"""
+    from src.data.data_preprocessing import process_stream
+
+    results = {}
+    for scale in scales:
+        raw_path = os.path.join(work_dir, f"raw_{scale}x.csv")
+        rows = write_raw(raw, scale, raw_path, seed)
+        start = time.perf_counter()
+        process_stream(raw_path, os.path.join(work_dir, f"processed_{scale}x.parquet"))
+        seconds = time.perf_counter() - start
+        results[f"{scale}x"] = {"rows": rows, "seconds": seconds, "rows_per_sec": rows / seconds}
+    return results
+
+
+def bench_cv(processed_path: str, model_params: dict, iterations: int) -> dict:
+    """Cross-validation wall time of model_building.evaluate_model"""
+    from src.models.model_building import create_model, evaluate_model
+
+    data = pd.read_parquet(processed_path)
+    params = {**model_params, "iterations": iterations}
+    _, _, timings = evaluate_model(create_model(params), data[FEATURE_COLUMNS], data[TARGET_COLUMN], params)
+    return {"rows": len(data), "iterations": iterations, **timings}
+
+
+# Run in a fresh interpreter so the first run of the page pays for imports,
+# asset loads and warm-up like the first visitor of a new server process.
+# The warm run is a new session once warm-up has finished.
+PAGE_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+from utils.warmup import start_warmup
+times = []
+for _ in range(2):
+    app = AppTest.from_file(sys.argv[1], default_timeout=300)
+    start = time.perf_counter()
+    app.run()
+    times.append(time.perf_counter() - start)
+    if app.exception:
+        sys.exit(f"{sys.argv[1]} raised {[e.message for e in app.exception]}")
+    start_warmup().join()
+print(json.dumps({'cold_s': times[0], 'warm_s': times[1]}))
+"""
+
+
+def bench_pages(pages: list, app_dir: str = ".") -> dict:
+    """Script run time of every page run from app_dir, cold (new process) and warm"""
+    results = {}
+    for page in pages:
+        process = subprocess.run([sys.executable, "-c", PAGE_SCRIPT, page], cwd=app_dir,
+                                 capture_output=True, text=True)
+        if process.returncode:
+            raise RuntimeError(f"Run of {page} failed: {process.stderr[-2000:]}")
+        results[os.path.basename(page)] = json.loads(process.stdout.strip().splitlines()[-1])
+    logger.debug("Page run times measured for %d pages", len(results))
+    return results
+
+
+def scaled_app(processed_path: str, app_dir: str, scale: int, cube_params: dict, seed: int) -> str:
+    """Copy of the app whose listings and analytics cube are built from scale times the rows.
+
+    Code, model and geometry are linked, per sector tables keep their size.
+    """
+    from src.features.build_analytics_cube import build_cube, load_data, save_cube
+    from src.features.build_arrow_assets import save_arrow
+    from utils.analytics_cube import CUBE_PATH
+    from utils.listing_index import LISTINGS_PATH
+
+    asset_dir = os.path.join(app_dir, "assets", "bin")
+    os.makedirs(asset_dir)
+    for path in APP_FILES + glob.glob(os.path.join("assets", "bin", "*")):
+        if path not in (LISTINGS_PATH, CUBE_PATH):
+            os.symlink(os.path.abspath(path), os.path.join(app_dir, path))
+
+    listings = LOADERS[os.path.splitext(LISTINGS_PATH)[1]](LISTINGS_PATH)
+    save_arrow(make_raw(listings, scale, seed), os.path.join(app_dir, LISTINGS_PATH))
+    cube = build_cube(load_data(processed_path), cube_params['price_bins'], cube_params['max_outliers'])
+    save_cube(cube, os.path.join(app_dir, CUBE_PATH))
+    return app_dir
+
+
+def run(params: dict, model_params: dict, cube_params: dict, sections: list) -> dict:
+    """Run benchmark sections, returns nested results.
+
+    Predict and page benchmarks run on the real data ("1x") and on every
+    synthetic scale.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        processed = {"1x": "./data/processed/data_processed.parquet"}
+        if set(sections) & {"predict", "preprocessing", "cv", "pages"}:
+            raw = pd.read_csv("./data/raw/raw.csv")
+            scales = sorted(set(params['scales']) | {params['cv_scale']})
+            preprocessing = bench_preprocessing(raw, scales, work_dir, params['seed'])
+            processed.update({f"{scale}x": os.path.join(work_dir, f"processed_{scale}x.parquet")
+                              for scale in params['scales']})
+            if "preprocessing" in sections:
+                results["preprocessing"] = preprocessing
+        if "predict" in sections:
+            results["predict"] = {
+                scale: bench_predict("models", pd.read_parquet(path, columns=FEATURE_COLUMNS),
+                                     params['predict_repeats'], params['batch_sizes'])
+                for scale, path in processed.items()
+            }
+        if "assets" in sections:
+            results["assets"] = bench_assets(os.path.join("assets", "bin"))
+            results["asset_memory"] = bench_asset_memory(os.path.join("assets", "bin"))
+        if "cv" in sections:
+            results["cv"] = bench_cv(os.path.join(work_dir, f"processed_{params['cv_scale']}x.parquet"),
+                                     model_params, params['cv_iterations'])
+        if "pages" in sections:
+            results["pages"] = {"1x": bench_pages(PAGES)}
+            for scale in params['scales']:
+                app_dir = scaled_app(processed[f"{scale}x"], os.path.join(work_dir, f"app_{scale}x"),
+                                     scale, cube_params, params['seed'])
+                results["pages"][f"{scale}x"] = bench_pages(PAGES, app_dir)
+    return results
+
+
+def main():
+    sections = ["predict", "assets", "preprocessing", "cv", "pages"]
+    parser = argparse.ArgumentParser(description="Benchmark inference, assets, training and pages")
+    parser.add_argument("--sections", nargs="+", choices=sections, default=sections)
+    parser.add_argument("--output", default="reports/benchmarks.json")
+    args = parser.parse_args()
+
+    try:
+        params = load_params('params.yaml')
+        results = run(params['benchmarks'], params['model_building'], params['analytics_cube'], args.sections)
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+        logger.debug("Benchmark results saved at %s", args.output)
+    except Exception as e:
+        logger.error("Failed to run benchmarks: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+
+def make_raw(raw: pd.DataFrame, scale: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic raw listings, scale times the rows of raw.
+
+    Rows are resampled with replacement so every categorical value is one
+    the model knows, Area and price get a few percent of multiplicative noise
+    so the copies are not exact duplicates.
+    """
+    rng = np.random.default_rng(seed)
+    synthetic = raw.sample(n=len(raw) * scale, replace=True, random_state=seed, ignore_index=True)
+    for col in ['Area', 'price']:
+        synthetic[col] = (synthetic[col] * rng.lognormal(0, 0.05, len(synthetic))).round(2)
+    return synthetic
+
+
+def write_raw(raw: pd.DataFrame, scale: int, path: str, seed: int = 42) -> int:
+    """Write synthetic raw CSV to path, returns number of rows"""
+    synthetic = make_raw(raw, scale, seed)
+    synthetic.to_csv(path, index=False)
+    return len(synthetic)
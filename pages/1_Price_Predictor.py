@@ -1,16 +1,29 @@
 import streamlit as st
-import pickle
 import pandas as pd
 import numpy as np
-
-def load_pickle(file_path: str):
-    """Load Pickle Files"""
-    with open(file_path, 'rb') as file:
-        data = pickle.load(file)
-    return data
-
-
-def getPropDetails(df : pd.DataFrame) -> tuple:
+import os
+import tempfile
+from concurrent.futures import TimeoutError
+from utils.assets import require_assets
+from utils.batch_scoring import score_file
+from utils.features import FEATURE_COLUMNS
+from utils.inference_executor import Overloaded, get_inference_executor
+from utils.instrumentation import timer
+from utils.listing_index import LISTINGS_PATH, ListingIndex, get_listing_index
+from utils.prediction_cache import prediction_cache
+from utils.serving_model import get_serving_model, serving_model_version
+from utils.warmup import start_warmup
+
+MODEL_DIR = 'assets/models'
+# seconds a session waits for the shared inference executor
+PREDICT_TIMEOUT = 5.0
+BUSY_MESSAGE = "Too many predictions are running right now, please try again in a moment."
+# rows per bulk scoring chunk, every chunk is a separate task on the inference executor
+BULK_CHUNKSIZE = 10_000
+# a chunk may take PREDICT_TIMEOUT plus this many seconds per row
+BULK_SECONDS_PER_ROW = 1e-3
+
+def getPropDetails(index: ListingIndex) -> tuple:
     """Get Property Configuration Details"""
     det1, det2, det3 = st.columns(3)
     with det1:
@@ -18,12 +31,12 @@ def getPropDetails(df : pd.DataFrame) -> tuple:
     with det2:
         city = st.selectbox('City', ['Chandigarh', 'Mohali', 'Panchkula'])
     with det3:
-        sector = st.selectbox('Sector', df[df['City'] == city]['Sector'].unique().tolist())
+        sector = st.selectbox('Sector', index.sectors_by_city.get(city, []))
     
     return property_type, city, sector
 
 
-def getPropConfig1(df: pd.DataFrame,property_type: str)-> tuple:
+def getPropConfig1(index: ListingIndex,property_type: str)-> tuple:
     """Get Property Configuration of Row 1"""
     propconf1, propconf2, propconf3 = st.columns(3)
     with propconf1:
@@ -31,10 +44,10 @@ def getPropConfig1(df: pd.DataFrame,property_type: str)-> tuple:
             np.log(float(st.number_input("Plot Area(Sq.ft)" if property_type == 'House/Villa' else "Built Up Area(Sq.ft)",
                                         min_value=100.00))))
     with propconf2:
-        bedRoom = int(st.selectbox("BedRooms", sorted(df['bedRoom'].unique())))
+        bedRoom = int(st.selectbox("BedRooms", index.bedrooms))
 
     with propconf3:
-        bathRoom = int(st.selectbox("BathRooms", sorted(df['bathroom'].unique())))
+        bathRoom = int(st.selectbox("BathRooms", index.bathrooms))
 
     return area, bedRoom, bathRoom
 
@@ -107,7 +120,7 @@ def getFloorFeatures() -> tuple:
     return FloorRise, FloorNum
 
 
-def getFeat1(df: pd.DataFrame)-> tuple:
+def getFeat1(index: ListingIndex)-> tuple:
     """Get Property Features Row 1"""
     age_dict = dataDictionaries()[2]
     feat1, feat2, feat3 = st.columns(3)
@@ -115,9 +128,9 @@ def getFeat1(df: pd.DataFrame)-> tuple:
         agePossession = st.selectbox("Property Age", list(age_dict.keys()))
         agePossession = age_dict[agePossession]
     with feat2:
-        facing = st.selectbox("Facing", sorted(df['facing'].unique()))
+        facing = st.selectbox("Facing", index.facing)
     with feat3:
-        Flooring = st.selectbox("Flooring", df['Flooring'].value_counts().index)
+        Flooring = st.selectbox("Flooring", index.flooring)
 
     return agePossession, facing, Flooring
 
@@ -142,14 +155,69 @@ def convertDF(property_type:str, sector:str, city:str, area:float, bedRoom:int,
     data = [[property_type, sector, city, area, bedRoom, bathRoom, balcony, facing,
                 FloorNum, FloorRise, agePossession, Flooring, Furnishing, CoveredParking, OpenParking,
                 pwrBkp, facilities]]
-    columns = ['property_type', 'Sector', 'City', 'Area', 'bedRoom', 'bathroom',
-            'balcony', 'facing', 'FloorNo', 'FloorRise', 'agePossession',
-            'Flooring', 'Furnishing', 'CoveredParking',
-            'OpenParking', 'PowerBackup', 'Facilities Categories']
-    one_df = pd.DataFrame(data, columns=columns)
+    one_df = pd.DataFrame(data, columns=FEATURE_COLUMNS)
     return one_df
 
 
+def predictPrice(model, features: tuple)-> float:
+    """Predict price(Cr INR) for features, repeated inputs are served from shared cache"""
+    def predict(threads: int) -> float:
+        with timer("predict"):
+            if hasattr(model, 'predict_one'):
+                # compact model encodes the tuple directly, no DataFrame needed
+                return float(np.expm1(model.predict_one(features, thread_count=threads)))
+            return float(np.expm1(model.predict(convertDF(*features), thread_count=threads))[0])
+
+    # all sessions share the executor's workers and CatBoost thread budget
+    compute = lambda: get_inference_executor().run(predict, timeout=PREDICT_TIMEOUT)
+    return prediction_cache.get_or_compute(features, serving_model_version(MODEL_DIR), compute)
+
+
+def comparisonBatch(features: tuple, index: ListingIndex, mode: str)-> pd.DataFrame:
+    """Repeat configuration for every sector of its city or over a grid of areas around its area"""
+    base = convertDF(*features)
+    if mode == 'Sectors':
+        values = index.sectors_by_city.get(base.at[0, 'City'], [])
+        column = 'Sector'
+    else:
+        area = np.exp(base.at[0, 'Area'])
+        values = np.log(np.unique(np.round(np.geomspace(area / 2, area * 2, 16), -1)))
+        column = 'Area'
+    batch = base.loc[base.index.repeat(len(values))].reset_index(drop=True)
+    batch[column] = values
+    return batch
+
+
+def comparePrices(model, features: tuple, index: ListingIndex, mode: str)-> pd.DataFrame:
+    """Price(Cr INR) of configuration across sectors or areas from a single batched predict"""
+    def compute() -> pd.DataFrame:
+        batch = comparisonBatch(features, index, mode)
+        with timer("predict_batch"):
+            prices = np.expm1(get_inference_executor().run(
+                lambda threads: model.predict(batch, thread_count=threads), timeout=PREDICT_TIMEOUT))
+        area = np.exp(batch['Area'])
+        table = pd.DataFrame({
+            'Sector' if mode == 'Sectors' else 'Area(Sq.ft)': batch['Sector'] if mode == 'Sectors' else area.round(),
+            'Price(Cr)': prices.round(2),
+            'Price per Sq.ft(INR)': (prices * 1e7 / area).round(),
+        })
+        # sectors ranked by price, areas kept in increasing order
+        return table.sort_values('Price(Cr)', ascending=False, ignore_index=True) if mode == 'Sectors' else table
+    return prediction_cache.get_or_compute(("compare", mode) + features, serving_model_version(MODEL_DIR), compute)
+
+
+def comparison(model, features: tuple, index: ListingIndex)-> None:
+    """Compare predicted price of current configuration across sectors of the city or areas"""
+    st.html("<h3>Compare Locations</h3>")
+    mode = st.radio("Compare across", ['Sectors', 'Area'], horizontal=True,
+                    format_func=lambda option: "Every sector in city" if option == 'Sectors' else "Area range")
+    if st.button('Compare'):
+        try:
+            st.dataframe(comparePrices(model, features, index, mode), hide_index=True)
+        except (Overloaded, TimeoutError):
+            st.warning(BUSY_MESSAGE)
+
+
 def printPrediction(base:float)-> None:
     """Print Prediction readable format and choose quantity between Cr or Lac INR"""
     low = base - 0.1
@@ -164,16 +232,56 @@ def printPrediction(base:float)-> None:
         st.markdown("**Average Price:** ₹ {} Cr".format(round(base, 2)))
 
 
+def bulkScoring(model)-> None:
+    """Score an uploaded listings file in chunks and offer results for download"""
+    st.html("<h3>Bulk Scoring</h3>")
+    st.markdown("Upload a CSV of listings with columns: " + ", ".join(f"`{col}`" for col in FEATURE_COLUMNS) +
+                ". Area should be in Sq.ft. Uploads and results are held in memory, so files are limited to "
+                "streamlit's upload size (200 MB by default), larger files can be scored with "
+                "`python -m utils.batch_scoring`.")
+    listings = st.file_uploader("Listings CSV", type="csv")
+    if listings is None or not st.button('Score File'):
+        return
+
+    def predict(X: pd.DataFrame) -> np.ndarray:
+        # chunks queue with single predictions of other sessions and share the CatBoost thread budget
+        with timer("predict_bulk"):
+            return get_inference_executor().run(lambda threads: model.predict(X, thread_count=threads),
+                                                timeout=PREDICT_TIMEOUT + len(X) * BULK_SECONDS_PER_ROW)
+
+    progress_bar = st.progress(0.0, text="Scoring listings...")
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as out:
+        out_path = out.name
+    try:
+        summary = score_file(listings, out_path, model, BULK_CHUNKSIZE, predict=predict,
+                             progress=lambda rows, frac: progress_bar.progress(frac, text=f"{rows} listings scored"))
+        st.markdown(f"Scored **{summary['rows']}** listings in {summary['seconds']:.1f}s "
+                    f"({summary['skipped']} rows skipped due to missing or invalid values).")
+        with open(out_path, 'rb') as file:
+            st.download_button("Download Predictions", file, file_name="scored_listings.csv", mime="text/csv")
+    except (Overloaded, TimeoutError):
+        st.warning(BUSY_MESSAGE)
+    except ValueError as e:
+        st.error(str(e))
+    finally:
+        os.remove(out_path)
+
+
 def main():
     st.set_page_config(
         page_title="Property Price Predictor",
         page_icon="🏠"
     )
 
-    # load dataframe and model
-    df = load_pickle('assets/bin/df_v3.pkl')
-    #model = load_pickle('model_pipeline_v2.pkl')
-    model = load_pickle('assets/models/model.pkl')
+    require_assets((LISTINGS_PATH,))
+
+    # preload model and assets of all pages in background, once per process
+    start_warmup(MODEL_DIR)
+
+    # load dataframe index and model
+    index = get_listing_index(LISTINGS_PATH)
+    #model = get_asset('model_pipeline_v2.pkl')
+    model = get_serving_model(MODEL_DIR)
 
     #Page Heading
     st.markdown(
@@ -182,13 +290,13 @@ def main():
     )
 
     # Property Details
-    property_type, city, sector = getPropDetails(df)
+    property_type, city, sector = getPropDetails(index)
 
     # Property Configurations
     st.html("<h3>Property Configurations</h3>")
 
     # Get Property Configurations
-    area, bedRoom, bathRoom = getPropConfig1(df,property_type)
+    area, bedRoom, bathRoom = getPropConfig1(index,property_type)
     balcony, OpenParking, CoveredParking = getPropConfig2()
     
     # Floor Features
@@ -201,18 +309,27 @@ def main():
 
     # Features
     st.html("<h3>Features</h3>")
-    agePossession, facing, Flooring = getFeat1(df)
+    agePossession, facing, Flooring = getFeat1(index)
     Furnishing, pwrBkp, facilities = getFeat2()
 
+    # features in the order expected by convertDF
+    features = (property_type, sector, city, area, bedRoom, bathRoom, balcony, facing,
+            FloorNum, FloorRise, agePossession, Flooring, Furnishing, CoveredParking, OpenParking,
+            pwrBkp, facilities)
+
     # Predict
     if st.button('Predict', type="primary"):
-        # convert data into df for prediction
-        predictData = convertDF(property_type, sector, city, area, bedRoom, bathRoom, balcony, facing,
-                FloorNum, FloorRise, agePossession, Flooring, Furnishing, CoveredParking, OpenParking,
-                pwrBkp, facilities)
+        try:
+            prediction = predictPrice(model, features)
+            printPrediction(prediction)
+        except (Overloaded, TimeoutError):
+            st.warning(BUSY_MESSAGE)
+
+    # Same configuration across sectors/areas
+    comparison(model, features, index)
 
-        prediction = np.expm1(model.predict(predictData))[0]
-        printPrediction(prediction)
+    # Bulk Scoring
+    bulkScoring(model)
 
 if __name__ == "__main__":
     main()
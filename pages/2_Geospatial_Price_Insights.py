@@ -1,25 +1,17 @@
 import streamlit as st
 import pandas as pd
-import pickle
-import plotly.express as px
+from utils.assets import get_asset, require_assets
+from utils.figure_cache import cached_figure
+from utils.instrumentation import timed
+from utils.geometry import MAP_PARAMS, SECTOR_GEOMETRY_PATH, get_sector_geometry, get_sector_lookup
+from utils.warmup import start_warmup
 
-def load_pickle(file_path: str):
-    """Load Pickle Files"""
-    with open(file_path, 'rb') as file:
-        data = pickle.load(file)
-    return data
+MAP_DF_PATH = 'assets/bin/map_df.arrow'
 
 def mapConfigs() -> dict:
     """Contain all coordinates and other data for plotting map"""
-    # Coordinates & Zoom
-    map_params = {
-        # lat, long, zoom
-        "Tricity": [30.698599, 76.767719, 10.4],
-        "Chandigarh": [30.736744, 76.784830, 11.45],
-        "Mohali": [30.699839, 76.747052, 10.4],
-        "Panchkula": [30.705016, 76.877993, 11.35]
-    }
-    return map_params
+    # Coordinates & Zoom (lat, long, zoom), shared with geometry preparation stage
+    return MAP_PARAMS
 
 def getInput() -> tuple:
     """Getting Input data for map"""
@@ -31,14 +23,38 @@ def getInput() -> tuple:
     return property_type, city
 
 
+@timed()
 def getPlotData(property_type: str,city: str,df: pd.DataFrame,
               map_group: pd.core.groupby.generic.DataFrameGroupBy) -> pd.DataFrame:
     """Filter Data on basis of city and property type"""
     if city == "Tricity":
-        return df[df['property_type'] == property_type]
+        plot_data = df[df['property_type'] == property_type]
     else:
         plot_data = map_group.get_group((property_type, city))
-        return plot_data
+    # Sectors without geometry can't be drawn
+    return plot_data[plot_data['Sector'].isin(get_sector_lookup())]
+
+
+def plotMap(plot_data: pd.DataFrame, city_map: dict, map_params: list):
+    """Choropleth of price per sqft across sectors"""
+    import plotly.express as px
+
+    fig = px.choropleth_mapbox(plot_data, locations="Sector", geojson=city_map,
+                                color="price_per_sqft",
+                                mapbox_style="open-street-map", color_continuous_scale="deep",
+                                center={"lat": map_params[0], "lon": map_params[1]},
+                                zoom=map_params[2],
+                                width=700, height=750)
+    
+    # Adjusting ColorBar
+    fig.update_layout(
+        coloraxis_colorbar={
+            'title': 'Price Per Sqft.', 'orientation': 'h', 'x': 0.5,
+            'y': 1, 'xanchor': 'center', 'yanchor': 'bottom',
+            'len': 1, 'thickness': 20,
+        }
+    )
+    return fig
 
 
 def main():
@@ -47,9 +63,13 @@ def main():
         page_icon="🏠"
     )
 
-    # Load GeoJSON and Map_data and Coordinates
-    tricity_map = load_pickle('assets/geojson/sector_json.pkl')
-    df = load_pickle('assets/bin/map_df.pkl')
+    require_assets((MAP_DF_PATH, SECTOR_GEOMETRY_PATH))
+
+    # preload model and assets of all pages in background, once per process
+    start_warmup()
+
+    # Load Map_data and Coordinates
+    df = get_asset(MAP_DF_PATH)
     map_params = mapConfigs()
     
     # Grouping data for plotting for single city
@@ -63,25 +83,10 @@ def main():
     # Getting Input for map
     property_type, city = getInput()
 
-    # Get Plot Data
-    plot_data = getPlotData(property_type,city,df,map_group)
-    
-    # Ploting map
-    fig = px.choropleth_mapbox(plot_data, locations="Sector", geojson=tricity_map,
-                                color="price_per_sqft",
-                                mapbox_style="open-street-map", color_continuous_scale="deep",
-                                center={"lat": map_params[city][0], "lon": map_params[city][1]},
-                                zoom=map_params[city][2],
-                                width=700, height=750)
-    
-    # Adjusting ColorBar
-    fig.update_layout(
-        coloraxis_colorbar={
-            'title': 'Price Per Sqft.', 'orientation': 'h', 'x': 0.5,
-            'y': 1, 'xanchor': 'center', 'yanchor': 'bottom',
-            'len': 1, 'thickness': 20,
-        }
-    )
+    # Ploting map from plot data and sector GeoJSON of selected city simplified for its zoom
+    fig = cached_figure("geospatial_map", (property_type, city), (MAP_DF_PATH, SECTOR_GEOMETRY_PATH),
+                        lambda: plotMap(getPlotData(property_type,city,df,map_group),
+                                        get_sector_geometry(city, map_params[city][2]), map_params[city]))
 
     st.plotly_chart(fig, use_container_width=True)
 
@@ -1,16 +1,16 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import pickle
-import plotly.express as px
-import matplotlib.pyplot as plt
-import seaborn as sns
+from utils.analytics_cube import (CUBE_PATH, bedroom_box_stats, bedroom_counts, get_analytics_cube, get_price_kde,
+                                  sector_bedroom_counts)
+from utils.assets import get_asset, require_assets
+from utils.figure_cache import cached_figure
+from utils.instrumentation import timed
+from utils.listing_index import LISTINGS_PATH, ListingIndex, get_listing_index
+from utils.scatter_lod import density_grid, downsample
+from utils.warmup import start_warmup
 
-
-def load_pickle(file_path: str):
-    """Load Pickle Files"""
-    with open(file_path, 'rb') as file:
-        data = pickle.load(file)
-    return data
+SUNBURST_PATH = 'assets/bin/sunburst_df.arrow'
 
 
 def aVp_Input()-> tuple:
@@ -20,22 +20,26 @@ def aVp_Input()-> tuple:
         city_name = st.selectbox('City', ['Tricity', 'Chandigarh', 'Mohali', 'Panchkula'], key=1)
     with input2:
         ptype = st.selectbox('Property Type', ['All', 'House/Villa', 'Flat/Apartment'], key=2)
-    return city_name, ptype
+    view = st.radio('View', ['Points', 'Density'], horizontal=True, key=8,
+                    help="Density counts listings per cell, outliers are drawn on top as points")
+    return city_name, ptype, view
 
 
-def filterDF_aVp(df: pd.DataFrame, city: str, property_type: str)-> pd.DataFrame:
+@timed()
+def filterDF_aVp(index: ListingIndex, city: str, property_type: str)-> pd.DataFrame:
     """Filter DataFrame for Area VS Price ScatterPlot"""
     if city == 'Tricity' and property_type == 'All':
-        return df
+        return index.df
     if city != 'Tricity' and property_type == 'All':
-        return df[df['City'] == city]
+        return index.city(city)
     if city == 'Tricity' and property_type != 'All':
-        return df[df['property_type'] == property_type]
+        return index.property_type(property_type)
 
     # Both city and property_type are specified
-    return df[(df['City'] == city) & (df['property_type'] == property_type)]
+    return index.city_type(city, property_type)
 
 
+@timed()
 def filterDF_SB(input: str,df: pd.DataFrame)-> pd.DataFrame:
     """Filter DataFrame for SunBurst Plot"""
     if input == "Both":
@@ -44,46 +48,125 @@ def filterDF_SB(input: str,df: pd.DataFrame)-> pd.DataFrame:
         return (df[df['property_type'] == input])
 
 
-def filterDF_Pie(df:pd.DataFrame)-> pd.DataFrame:
-    """Take input and Filter DataFrame for PieChart"""
+@timed()
+def filterDF_Pie(index: ListingIndex, cube: dict)-> tuple:
+    """Take input and get BedRoom counts for PieChart"""
     bhk_city = st.selectbox('City', ['Tricity', 'Chandigarh', 'Mohali', 'Panchkula'], key=4)
     if bhk_city == 'Tricity':
-        return df
+        return bedroom_counts(cube), bhk_city, 'Overall'
     else:
-        # filter on basis of city and extract sectors
-        filterCity = df[df['City'] == bhk_city]
-        sect_list = filterCity['Sector'].unique().tolist()
-        sect_list.insert(0, 'Overall')
+        # extract sectors of city
+        sect_list = ['Overall'] + index.sectors_by_city.get(bhk_city, [])
         # Take input from user about Sector
         sector = st.selectbox('Sector', sect_list, key=5)
 
         if sector == 'Overall':
-            return filterCity
+            return bedroom_counts(cube, bhk_city), bhk_city, sector
         else:
-            # Filter on Basis of Sector
-            filterSector = df[df['Sector'] == sector]
-            return filterSector
+            # Counts on Basis of Sector
+            return sector_bedroom_counts(cube, sector), bhk_city, sector
 
 
-def filterDF_Box(df:pd.DataFrame) -> tuple:
-    """Take Input and Filter on Basis of City for BoxPlot"""
+@timed()
+def filterDF_Box(cube: dict) -> tuple:
+    """Take Input and get BoxPlot statistics on Basis of City"""
     city = st.selectbox('City', ['Tricity', 'Chandigarh', 'Mohali', 'Panchkula'], key=6)
-    box_df = df[(df['bedRoom'] < 5)] # limit only till 4 bedRooms
-    if city == "Tricity":
-        return box_df, city
-    else:
-        filterCity = box_df[box_df['City'] == city]
-        return filterCity, city
+    # cube only contains boxes till 4 bedRooms
+    stats, outliers = bedroom_box_stats(cube, city)
+    return stats, outliers, city
 
 
-def filterDF_KDE(df:pd.DataFrame) -> tuple:
-    """Take Input and Filter on Basis of City for KDE plot"""
+@timed()
+def filterDF_KDE() -> tuple:
+    """Take Input and get price density curves on Basis of City for KDE plot"""
     city = st.selectbox('City', ['Tricity', 'Chandigarh', 'Mohali', 'Panchkula'], key=7)
-    if city == "Tricity":
-        return df , city
-    else:
-        filterCity = df[df['City'] == city]
-        return filterCity, city
+    return get_price_kde(city), city
+
+def plotScatter(df: pd.DataFrame):
+    """Area VS Price ScatterPlot drawn with WebGL, large frames downsampled keeping outliers"""
+    import plotly.express as px
+
+    rows, n_outliers = downsample(df, 'Area', 'price')
+    title = "Area VS Price"
+    if len(rows) < len(df):
+        title += f" ({len(rows):,} of {len(df):,} listings, {n_outliers:,} outliers kept)"
+    fig = px.scatter(rows, x='Area', y='price', color='bedRoom', title=title,
+                    width=800, height=550, render_mode='webgl')
+    fig.update_layout(
+        xaxis_title="Area(Sqft.)",
+        yaxis_title="Price (Crores INR)"
+    )
+    return fig
+
+
+def plotDensity(df: pd.DataFrame):
+    """Area VS Price listing counts per cell with outliers on top"""
+    import plotly.graph_objects as go
+
+    counts, x_centers, y_centers, outliers = density_grid(df, 'Area', 'price')
+    fig = go.Figure(go.Heatmap(x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan),
+                               colorscale='Blues', colorbar_title='Listings',
+                               hovertemplate="Area %{x:.0f}<br>Price %{y:.2f}<br>%{z} listings<extra></extra>"))
+    fig.add_trace(go.Scattergl(x=outliers['Area'], y=outliers['price'], mode='markers', name='outliers',
+                               marker=dict(color='crimson', size=5)))
+    fig.update_layout(title=f"Area VS Price density ({len(df):,} listings, {len(outliers):,} outliers)",
+                      width=800, height=550, showlegend=False)
+    fig.update_layout(
+        xaxis_title="Area(Sqft.)",
+        yaxis_title="Price (Crores INR)"
+    )
+    return fig
+
+
+def plotSunburst(df: pd.DataFrame):
+    """Sunburst of listing count and price per sqft by City and Sector"""
+    import plotly.express as px
+
+    return px.sunburst(df,
+                    path=['City', 'Sector'],
+                    values='count',
+                    color='Price Per Sqft',
+                    color_continuous_scale='thermal',
+                    title="House Count and Price per Sqft across Cities and Sectors",
+                    height=650)
+
+
+def plotPie(pieDF: pd.DataFrame):
+    """Share of listings per bedroom count"""
+    import plotly.express as px
+
+    return px.pie(pieDF, names='bedRoom', values='count')
+
+
+def plotBox(boxStats: pd.DataFrame, boxOutliers: pd.DataFrame, city: str):
+    """Bedroom BoxPlot from precomputed quartiles"""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Box(x=boxStats['bedRoom'], q1=boxStats['q1'], median=boxStats['median'],
+                           q3=boxStats['q3'], lowerfence=boxStats['lowerfence'],
+                           upperfence=boxStats['upperfence'], name='price', boxpoints=False))
+    fig.add_trace(go.Scatter(x=boxOutliers['bedRoom'], y=boxOutliers['price'], mode='markers',
+                             name='outliers', marker_color=fig.data[0].marker.color))
+    fig.update_layout(title=f'{city}\'s Bedroom Boxplot', showlegend=False)
+    fig.update_layout(
+        xaxis_title="BedRooms",
+        yaxis_title="Price (Crores INR)"
+    )
+    return fig
+
+
+def plotKDE(kdeDF: pd.DataFrame, city: str):
+    """KDE plot of prices per property type"""
+    import plotly.express as px
+
+    fig = px.line(kdeDF, x='price', y='density', color='property_type',
+                  title=f'KDE Plot of Property Price in {city}', width=800, height=450)
+    fig.update_layout(
+        xaxis_title="Price(Crores INR)",
+        yaxis_title="Density"
+    )
+    return fig
+
 
 def main():
     st.set_page_config(
@@ -91,6 +174,11 @@ def main():
         page_icon="🏠"
     )
 
+    require_assets((LISTINGS_PATH, CUBE_PATH, SUNBURST_PATH))
+
+    # preload model and assets of all pages in background, once per process
+    start_warmup()
+
     st.markdown(
         "<h1 style='text-align: center;'>Analytical Module</h1>",
         unsafe_allow_html=True
@@ -99,8 +187,9 @@ def main():
                 "previous modules.</p>", unsafe_allow_html=True)
 
     # Load main dataframe and suburst dataframe
-    main_df = load_pickle('assets/bin/df_v3.pkl')
-    sb_df = load_pickle('assets/bin/sunburst_df.pkl')
+    main_index = get_listing_index(LISTINGS_PATH)
+    cube = get_analytics_cube()
+    sb_df = get_asset(SUNBURST_PATH)
     
 
     ## Area VS Price Scatter Plot
@@ -109,13 +198,10 @@ def main():
         unsafe_allow_html=True
     )
     # Area VS Price Scatterplot inputs
-    city_name, ptype = aVp_Input()
-    fig1 = px.scatter(filterDF_aVp(main_df, city_name, ptype), x='Area', y='price', color='bedRoom', title="Area VS Price",
-                    width=800, height=550)
-    fig1.update_layout(
-        xaxis_title="Area(Sqft.)",
-        yaxis_title="Price (Crores INR)"
-    )
+    city_name, ptype, view = aVp_Input()
+    plot = plotDensity if view == 'Density' else plotScatter
+    fig1 = cached_figure("analytics_scatter", (city_name, ptype, view), (LISTINGS_PATH,),
+                         lambda: plot(filterDF_aVp(main_index, city_name, ptype)))
     st.plotly_chart(fig1)
 
 
@@ -125,13 +211,8 @@ def main():
         unsafe_allow_html=True
     )
     input3 = st.selectbox('Property Type', ['House/Villa', 'Flat/Apartment', 'Both'], key=3)
-    fig2 = px.sunburst(filterDF_SB(input3,sb_df),
-                    path=['City', 'Sector'],
-                    values='count',
-                    color='Price Per Sqft',
-                    color_continuous_scale='thermal',
-                    title="House Count and Price per Sqft across Cities and Sectors",
-                    height=650)
+    fig2 = cached_figure("analytics_sunburst", (input3,), (SUNBURST_PATH,),
+                         lambda: plotSunburst(filterDF_SB(input3,sb_df)))
 
     st.plotly_chart(fig2)
     st.markdown("In this sunburst plot, size of an element represents elements contribution to size of dataset and "
@@ -143,9 +224,10 @@ def main():
         "<h3 style='text-align: center;'>BHK Pie Chart</h3>",
         unsafe_allow_html=True
     )
-    pieDF = filterDF_Pie(main_df)
+    pieDF, pie_city, pie_sector = filterDF_Pie(main_index, cube)
     # Plot Pie Chart
-    fig3 = px.pie(pieDF, names='bedRoom')
+    fig3 = cached_figure("analytics_pie", (pie_city, pie_sector), (CUBE_PATH,),
+                         lambda: plotPie(pieDF))
     st.plotly_chart(fig3)
 
 
@@ -154,14 +236,10 @@ def main():
         "<h3 style='text-align: center;'>Bedroom Boxplot</h3>",
         unsafe_allow_html=True
     )
-    boxDF, box_city = filterDF_Box(main_df)
+    boxStats, boxOutliers, box_city = filterDF_Box(cube)
     # Plot Boxplot
-    fig4 = px.box(boxDF, x='bedRoom', y='price',
-                title=f'{box_city}\'s Bedroom Boxplot')
-    fig4.update_layout(
-        xaxis_title="BedRooms",
-        yaxis_title="Price (Crores INR)"
-    )
+    fig4 = cached_figure("analytics_box", (box_city,), (CUBE_PATH,),
+                         lambda: plotBox(boxStats, boxOutliers, box_city))
     st.plotly_chart(fig4)
 
 
@@ -170,14 +248,10 @@ def main():
         "<h3 style='text-align: center;'>KDE plot of prices</h3>",
         unsafe_allow_html=True
     )
-    kdeDF, kde_city = filterDF_KDE(main_df)
+    kdeDF, kde_city = filterDF_KDE()
     # Plot KDE plot
-    fig5 = plt.figure(figsize=(10, 5))
-    sns.kdeplot(kdeDF, x='price',
-                hue='property_type')
-    plt.title(f'KDE Plot of Property Price in {kde_city}')
-    plt.xlabel('Price(Crores INR)')
-    st.pyplot(fig5)
+    fig5 = cached_figure("analytics_kde", (kde_city,), (CUBE_PATH,), lambda: plotKDE(kdeDF, kde_city))
+    st.plotly_chart(fig5)
 
 
 if __name__ == "__main__":
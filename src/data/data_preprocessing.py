@@ -1,7 +1,19 @@
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
+import io
+import json
+import time
+import hashlib
+import inspect
+import shutil
+import yaml
 import logging
+from itertools import islice
+from utils.features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, TARGET_COLUMN
+from utils.instrumentation import timed
 
 # logging configuration
 logger = logging.getLogger('data_preprocessing')
@@ -21,6 +33,18 @@ logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
 
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path,'r') as file:
+            params = yaml.safe_load(file)
+        return params
+    except Exception as e:
+        logger.error("Unexpected error occured while loading params file: %s",e)
+        raise
+
+
+@timed()
 def load_data(path:str)->pd.DataFrame:
     """Load Data from file path"""
     try:
@@ -38,14 +62,26 @@ def load_data(path:str)->pd.DataFrame:
         raise
 
 
+# Raw columns not used by the model
+COLS_DROP = ['Pooja Room','Servant Room','Study Room','Store Room',
+            'Other Room','Main Road','Park/Garden','Club','Overlook Others',
+            'Pool','PetFriendly','WheelChairFriendly','24*7 Water',
+            'MuniCorp Water','Borewell/Tank','GatedCommunity']
+
+# Schema of processed data, categoricals are dictionary encoded and read back as pandas category
+PROCESSED_SCHEMA = pa.schema(
+    [(column, pa.dictionary(pa.int32(), pa.string()) if column in CATEGORICAL_COLUMNS
+      else pa.float64() if column == 'Area' else pa.int32())
+     for column in FEATURE_COLUMNS]
+    + [(TARGET_COLUMN, pa.float64())]
+)
+
+
+@timed()
 def drop_columns(df:pd.DataFrame)->pd.DataFrame:
     """Drop Unnecessary Columns from DataFrame"""
     try:
-        cols_drop = ['Pooja Room','Servant Room','Study Room','Store Room',
-                    'Other Room','Main Road','Park/Garden','Club','Overlook Others',
-                    'Pool','PetFriendly','WheelChairFriendly','24*7 Water',
-                    'MuniCorp Water','Borewell/Tank','GatedCommunity']
-        df.drop(columns = cols_drop,inplace = True)
+        df.drop(columns = COLS_DROP,inplace = True)
         logger.debug("Columns Dropped from DataFrame")
         return df
     except Exception as e:
@@ -53,6 +89,7 @@ def drop_columns(df:pd.DataFrame)->pd.DataFrame:
         raise
 
 
+@timed()
 def transform_df(df):
     """Transform DataFrame"""
     try:
@@ -65,8 +102,9 @@ def transform_df(df):
         raise
 
 
+@timed()
 def save_df(df,path):
-    """Save Dataframe to path"""
+    """Save Dataframe to path as CSV"""
     try:
         df.to_csv(path,index=False)
         logger.debug(f"DataFrame saved to: {path}")
@@ -75,8 +113,172 @@ def save_df(df,path):
         raise
 
 
+def to_table(df:pd.DataFrame)->pa.Table:
+    """Convert processed DataFrame to Arrow table with processed data schema"""
+    df = df.astype({col: 'category' for col in CATEGORICAL_COLUMNS})
+    return pa.Table.from_pandas(df[PROCESSED_SCHEMA.names], schema=PROCESSED_SCHEMA, preserve_index=False)
+
+
+@timed()
+def save_parquet(df,path):
+    """Save Dataframe to path as Parquet with processed data schema"""
+    try:
+        pq.write_table(to_table(df), path)
+        logger.debug(f"DataFrame saved to: {path}")
+    except Exception as e:
+        logger.error("Unexpected error occured while saving dataframe: %s",e)
+        raise
+
+
+@timed()
+def process_stream(src:str, parquet_path:str, csv_path:str = None, chunksize:int = 100_000) -> int:
+    """Process raw CSV chunk by chunk, appending each chunk to the outputs.
+
+    Dropped columns are never parsed and only one chunk is held in memory,
+    every chunk becomes a row group of the Parquet file.
+    """
+    try:
+        start = time.perf_counter()
+        rows = 0
+        chunks = pd.read_csv(src, chunksize=chunksize, usecols=lambda col: col not in COLS_DROP)
+        with pq.ParquetWriter(parquet_path, PROCESSED_SCHEMA) as writer:
+            for chunk in chunks:
+                chunk = transform_df(chunk)
+                writer.write_table(to_table(chunk))
+                if csv_path:
+                    chunk.to_csv(csv_path, mode='w' if rows == 0 else 'a', header=rows == 0, index=False)
+                rows += len(chunk)
+
+        seconds = time.perf_counter() - start
+        logger.debug("Processed %d rows in %.2fs (%.0f rows/sec)", rows, seconds, rows / max(seconds, 1e-9))
+        return rows
+    except Exception as e:
+        logger.error("Unexpected error occured while processing data in chunks: %s",e)
+        raise
+
+
+def processing_version() -> str:
+    """Hash of the code, dropped columns and schema partitions are processed with"""
+    source = inspect.getsource(transform_df) + inspect.getsource(to_table)
+    spec = json.dumps({"cols_drop": COLS_DROP, "schema": PROCESSED_SCHEMA.to_string()})
+    return hashlib.md5((source + spec).encode()).hexdigest()
+
+
+def iter_blocks(path:str, rows:int):
+    """Yield header + raw bytes of consecutive blocks of rows lines of a CSV file.
+
+    Blocks are split on lines, so quoted fields must not contain newlines.
+    """
+    with open(path,'rb') as file:
+        header = file.readline()
+        while True:
+            block = b''.join(islice(file, rows))
+            if not block:
+                break
+            yield header + block
+
+
+@timed()
+def process_partitions(raw_dir:str, data_path:str, partition_rows:int) -> dict:
+    """Process only new or changed partitions of raw CSV files.
+
+    Every block of partition_rows lines is a partition named by the hash of
+    its bytes, so appended rows only change the last block of a file. Processed
+    partitions are kept in data_path/partitions, ones no longer found in raw
+    data are removed. All partitions are processed again when the processing
+    version (see processing_version) differs from the one in the manifest.
+    Returns manifest of all partitions in order and the hashes processed in
+    this run.
+    """
+    try:
+        start = time.perf_counter()
+        partitions_dir = os.path.join(data_path,"partitions")
+        manifest_path = os.path.join(data_path,"manifest.json")
+        version = processing_version()
+        previous = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as file:
+                previous = json.load(file)
+        if previous.get('version') != version:
+            if os.path.isdir(partitions_dir):
+                logger.warning("Processing code or schema changed, reprocessing all partitions")
+            shutil.rmtree(partitions_dir, ignore_errors=True)
+        os.makedirs(partitions_dir, exist_ok=True)
+
+        partitions, added, rows = [], [], 0
+        for name in sorted(os.listdir(raw_dir)):
+            if not name.endswith('.csv'):
+                continue
+            for block in iter_blocks(os.path.join(raw_dir,name), partition_rows):
+                digest = hashlib.md5(block).hexdigest()
+                path = os.path.join(partitions_dir, f"{digest}.parquet")
+                if not os.path.exists(path):
+                    df = pd.read_csv(io.BytesIO(block), usecols=lambda col: col not in COLS_DROP)
+                    save_parquet(transform_df(df), path)
+                    added.append(digest)
+                    rows += len(df)
+                partitions.append({"hash": digest, "source": name})
+
+        live = {partition['hash'] for partition in partitions}
+        for file in os.listdir(partitions_dir):
+            if file.removesuffix('.parquet') not in live:
+                os.remove(os.path.join(partitions_dir, file))
+
+        manifest = {"version": version, "partitions": partitions, "added": added}
+        with open(manifest_path, 'w') as file:
+            json.dump(manifest, file, indent=4)
+
+        seconds = time.perf_counter() - start
+        logger.debug("Processed %d of %d partitions, %d rows in %.2fs (%.0f rows/sec)",
+                     len(added), len(partitions), rows, seconds, rows / max(seconds, 1e-9))
+        return manifest
+    except Exception as e:
+        logger.error("Unexpected error occured while processing partitions: %s",e)
+        raise
+
+
+@timed()
+def combine_partitions(manifest:dict, data_path:str, parquet_path:str, csv_path:str = None) -> None:
+    """Concatenate processed partitions into the processed data file, one row group each"""
+    try:
+        with pq.ParquetWriter(parquet_path, PROCESSED_SCHEMA) as writer:
+            for i, partition in enumerate(manifest['partitions']):
+                table = pq.read_table(os.path.join(data_path,"partitions",f"{partition['hash']}.parquet"))
+                writer.write_table(table)
+                if csv_path:
+                    table.to_pandas().to_csv(csv_path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        logger.debug(f"DataFrame saved to: {parquet_path}")
+    except Exception as e:
+        logger.error("Unexpected error occured while combining partitions: %s",e)
+        raise
+
+
 def main():
     try:
+        params = load_params('params.yaml')['data_preprocessing']
+
+        # Make Directory
+        data_path = os.path.join("data","processed")
+        os.makedirs(data_path, exist_ok=True)
+        parquet_path = os.path.join(data_path,"data_processed.parquet")
+        csv_path = os.path.join(data_path,"data_processed.csv") if params['export_csv'] else None
+
+        # Process new raw partitions only
+        if params['incremental']:
+            manifest = process_partitions("./data/raw", data_path, params['partition_rows'])
+            combine_partitions(manifest, data_path, parquet_path, csv_path)
+            return
+
+        # Full run, processed partitions no longer describe the data
+        shutil.rmtree(os.path.join(data_path,"partitions"), ignore_errors=True)
+        if os.path.exists(os.path.join(data_path,"manifest.json")):
+            os.remove(os.path.join(data_path,"manifest.json"))
+
+        # Stream raw data in chunks
+        if params['chunksize']:
+            process_stream("./data/raw/raw.csv", parquet_path, csv_path, params['chunksize'])
+            return
+
         # Load Data
         df = load_data("./data/raw/raw.csv")
 
@@ -84,12 +286,10 @@ def main():
         df = drop_columns(df)
         df = transform_df(df)
 
-        # Make Directory
-        data_path = os.path.join("data","processed")
-        os.makedirs(data_path)
-
         # Save DataFrame
-        save_df(df,os.path.join(data_path,"data_processed.csv"))
+        save_parquet(df,parquet_path)
+        if csv_path:
+            save_df(df,csv_path)
 
     except Exception as e:
         logger.error("Failed to Process Data: %s",e)
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import os
+import pickle
+import yaml
+from utils.instrumentation import timed
+from utils.logger import get_logger
+
+logger = get_logger('analytics_cube')
+
+ALL_CITIES = 'Tricity'
+ALL_TYPES = 'All'
+# BoxPlot only shows properties till 4 bedrooms
+BEDROOM_CAP = 5
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        return params
+    except Exception as e:
+        logger.error("Unexpected error occured while loading params file: %s", e)
+        raise
+
+
+@timed()
+def load_data(path: str) -> pd.DataFrame:
+    """Load processed data and undo log transforms of price and Area"""
+    try:
+        df = pd.read_parquet(path, columns=['property_type', 'Sector', 'City', 'Area', 'bedRoom', 'price'])
+        # cube tables are keyed by plain strings
+        df = df.astype({'property_type': str, 'Sector': str, 'City': str})
+        df['price'] = np.expm1(df['price'])
+        df['Area'] = np.exp(df['Area'])
+        logger.debug("Data loaded from %s", path)
+        return df
+    except Exception as e:
+        logger.error("Unexpected error occured while loading the data: %s", e)
+        raise
+
+
+def iter_scopes(df: pd.DataFrame):
+    """Yield (City, property_type, rows) for every combination including Tricity/All rollups"""
+    cities = [ALL_CITIES] + sorted(df['City'].unique())
+    types = [ALL_TYPES] + sorted(df['property_type'].unique())
+    for city in cities:
+        city_df = df if city == ALL_CITIES else df[df['City'] == city]
+        for property_type in types:
+            scope_df = city_df if property_type == ALL_TYPES else city_df[city_df['property_type'] == property_type]
+            if len(scope_df):
+                yield city, property_type, scope_df
+
+
+def box_stats(prices: np.ndarray, max_outliers: int) -> tuple:
+    """Quartiles and whiskers as plotted by plotly box (linear quartiles, 1.5 IQR fences)"""
+    q1, median, q3 = np.percentile(prices, [25, 50, 75])
+    iqr = q3 - q1
+    inside = prices[(prices >= q1 - 1.5 * iqr) & (prices <= q3 + 1.5 * iqr)]
+    stats = {
+        "count": len(prices), "lowerfence": inside.min(), "q1": q1,
+        "median": median, "q3": q3, "upperfence": inside.max(),
+    }
+    outliers = prices[(prices < stats["lowerfence"]) | (prices > stats["upperfence"])]
+    if len(outliers) > max_outliers:
+        # keep the most extreme ones
+        order = np.argsort(np.abs(outliers - median))[::-1]
+        outliers = outliers[order[:max_outliers]]
+    return stats, np.sort(outliers)
+
+
+@timed()
+def build_cube(df: pd.DataFrame, price_bins: int, max_outliers: int) -> dict:
+    """Aggregate listings per City x property_type into compact tables"""
+    try:
+        edges = np.linspace(0, df['price'].max() * 1.05, price_bins + 1)
+        bedroom_counts, box_rows, outlier_rows, price_stats = [], [], [], []
+        price_hist = {}
+
+        for city, property_type, scope_df in iter_scopes(df):
+            key = {"City": city, "property_type": property_type}
+
+            counts = scope_df['bedRoom'].value_counts().sort_index()
+            bedroom_counts += [{**key, "bedRoom": bed, "count": n} for bed, n in counts.items()]
+
+            capped = scope_df[scope_df['bedRoom'] < BEDROOM_CAP]
+            for bed, bed_df in capped.groupby('bedRoom'):
+                stats, outliers = box_stats(bed_df['price'].to_numpy(), max_outliers)
+                box_rows.append({**key, "bedRoom": bed, **stats})
+                outlier_rows += [{**key, "bedRoom": bed, "price": price} for price in outliers]
+
+            prices = scope_df['price'].to_numpy()
+            price_hist[(city, property_type)] = np.histogram(prices, bins=edges)[0].astype(np.int32)
+            price_stats.append({**key, "count": len(prices), "mean": prices.mean(),
+                                "std": prices.std(ddof=1) if len(prices) > 1 else 0.0})
+
+        sector_bedroom_counts = df.groupby(['Sector', 'bedRoom']).size().rename('count')
+
+        cube = {
+            "bedroom_counts": pd.DataFrame(bedroom_counts),
+            "box_stats": pd.DataFrame(box_rows),
+            "box_outliers": pd.DataFrame(outlier_rows, columns=["City", "property_type", "bedRoom", "price"]),
+            "price_hist_edges": edges,
+            "price_hist": price_hist,
+            "price_stats": pd.DataFrame(price_stats),
+            "sector_bedroom_counts": sector_bedroom_counts.reset_index(),
+        }
+        logger.debug("Analytics cube built for %d scopes", len(price_hist))
+        return cube
+    except Exception as e:
+        logger.error("Unexpected error occured while building analytics cube: %s", e)
+        raise
+
+
+@timed()
+def save_cube(cube: dict, path: str) -> None:
+    """Save cube through pickle"""
+    try:
+        with open(path, 'wb') as file:
+            pickle.dump(cube, file)
+        logger.debug("Analytics cube saved at %s", path)
+    except Exception as e:
+        logger.error("Unexpected error occured while saving analytics cube: %s", e)
+        raise
+
+
+def main():
+    try:
+        params = load_params('params.yaml')['analytics_cube']
+        df = load_data("./data/processed/data_processed.parquet")
+        cube = build_cube(df, params['price_bins'], params['max_outliers'])
+        save_cube(cube, os.path.join("assets", "bin", "analytics_cube.pkl"))
+    except Exception as e:
+        logger.error("Failed to build analytics cube: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
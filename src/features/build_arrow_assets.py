@@ -0,0 +1,56 @@
+import json
+import os
+import pandas as pd
+import pyarrow as pa
+from utils.assets import load_pickle
+from utils.instrumentation import timed
+from utils.logger import get_logger
+
+logger = get_logger('build_arrow_assets')
+
+ASSET_DIR = os.path.join("assets", "bin")
+
+# Tabular assets served by the pages, each <name>.pkl is written as <name>.arrow
+ARROW_ASSETS = ["listings", "map_df", "sunburst_df"]
+
+
+@timed()
+def save_arrow(df: pd.DataFrame, path: str) -> int:
+    """Write DataFrame as uncompressed Arrow IPC file, returns file size in bytes.
+
+    The file is written next to the target and renamed over it, processes that
+    still map the old file keep reading the old content.
+    """
+    try:
+        table = pa.Table.from_pandas(df)
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        logger.debug("Arrow file saved at %s", path)
+        return os.path.getsize(path)
+    except Exception as e:
+        logger.error("Unexpected error occured while saving Arrow file %s: %s", path, e)
+        raise
+
+
+def main():
+    try:
+        report = {}
+        for name in ARROW_ASSETS:
+            df = load_pickle(os.path.join(ASSET_DIR, f"{name}.pkl"))
+            size = save_arrow(df, os.path.join(ASSET_DIR, f"{name}.arrow"))
+            report[name] = {"rows": len(df), "columns": len(df.columns), "bytes": size}
+
+        os.makedirs("reports", exist_ok=True)
+        with open("reports/arrow_assets.json", 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug("Arrow assets built: %s", ", ".join(report))
+    except Exception as e:
+        logger.error("Failed to build Arrow assets: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
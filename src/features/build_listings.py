@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+import pickle
+from utils.assets import load_pickle
+from utils.instrumentation import timed
+from utils.listing_index import LISTING_COLUMNS, LISTINGS_PICKLE_PATH
+from utils.logger import get_logger
+
+logger = get_logger('build_listings')
+
+
+@timed()
+def compact_listings(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep columns used by pages, strings as categoricals and integers downcast.
+
+    Area and price stay float64, they are shown in plot hovers where float32
+    would show rounding noise.
+    """
+    try:
+        compact = df[LISTING_COLUMNS].copy()
+        for col in compact.columns:
+            if compact[col].dtype == object:
+                compact[col] = compact[col].astype('category')
+            elif np.issubdtype(compact[col].dtype, np.integer):
+                compact[col] = pd.to_numeric(compact[col], downcast='integer')
+        logger.debug("Listings compacted to %d columns", len(compact.columns))
+        return compact.reset_index(drop=True)
+    except Exception as e:
+        logger.error("Unexpected error occured while compacting listings: %s", e)
+        raise
+
+
+def memory_report(original: pd.DataFrame, compact: pd.DataFrame) -> dict:
+    """Deep memory usage in bytes of both frames, total and per kept column"""
+    original_usage = original.memory_usage(deep=True, index=False)
+    compact_usage = compact.memory_usage(deep=True, index=False)
+    return {
+        "rows": len(compact),
+        "original_bytes": int(original_usage.sum()),
+        "compact_bytes": int(compact_usage.sum()),
+        "reduction": 1 - compact_usage.sum() / original_usage.sum(),
+        "columns": {
+            col: {"dtype": str(compact[col].dtype), "original_bytes": int(original_usage[col]),
+                  "compact_bytes": int(compact_usage[col])}
+            for col in compact.columns
+        }
+    }
+
+
+def main():
+    try:
+        df = load_pickle(os.path.join("assets", "bin", "df_v3.pkl"))
+        compact = compact_listings(df)
+
+        with open(LISTINGS_PICKLE_PATH, 'wb') as file:
+            pickle.dump(compact, file)
+        logger.debug("Listings saved at %s", LISTINGS_PICKLE_PATH)
+
+        report = memory_report(df, compact)
+        os.makedirs("reports", exist_ok=True)
+        with open("reports/listings_memory.json", 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug("Listings memory %.2f MB -> %.2f MB", report['original_bytes'] / 2**20,
+                     report['compact_bytes'] / 2**20)
+    except Exception as e:
+        logger.error("Failed to build listings: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import numpy as np
+import math
+import os
+import pickle
+from utils.assets import load_json, load_pickle
+from utils.geometry import HOME_MAP_ZOOM, MAP_PARAMS, SECTOR_GEOMETRY_PATH, TRICITY_GEOMETRY_PATH
+from utils.instrumentation import timed
+from utils.logger import get_logger
+
+logger = get_logger('prepare_geometry')
+
+# Mapbox GL (used by plotly maps) renders the world 512px wide at zoom 0
+TILE_SIZE = 512
+
+
+def zoom_tolerance(zoom: float, lat: float) -> float:
+    """Half a screen pixel in degrees at zoom level and latitude"""
+    return 0.5 * 360 / (TILE_SIZE * 2 ** zoom) * math.cos(math.radians(lat))
+
+
+def simplify_ring(ring: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker simplification of a closed ring"""
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = ring[end] - ring[start]
+        points = ring[start + 1:end] - ring[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(points[:, 0], points[:, 1])
+        else:
+            distances = np.abs(segment[0] * points[:, 1] - segment[1] * points[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack += [(start, split), (split, end)]
+
+    simplified = ring[keep]
+    # polygon ring needs at least 4 points (closed triangle)
+    return simplified if len(simplified) >= 4 else ring
+
+
+def simplify_geometry(geometry: dict, tolerance: float, decimals: int) -> dict:
+    """Simplify rings of Polygon/MultiPolygon and round coordinates"""
+    def ring_coords(ring):
+        return np.round(simplify_ring(np.asarray(ring, dtype=float), tolerance), decimals).tolist()
+
+    if geometry['type'] == 'Polygon':
+        coordinates = [ring_coords(ring) for ring in geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        coordinates = [[ring_coords(ring) for ring in polygon] for polygon in geometry['coordinates']]
+    else:
+        return geometry
+    return {"type": geometry['type'], "coordinates": coordinates}
+
+
+@timed()
+def simplify_collection(features: list, zoom: float, lat: float, keep_properties: tuple = ()) -> dict:
+    """FeatureCollection with geometries simplified for zoom level and unused properties dropped"""
+    tolerance = zoom_tolerance(zoom, lat)
+    decimals = math.ceil(-math.log10(tolerance))
+    simplified = []
+    for feature in features:
+        simple_feature = {
+            "type": "Feature",
+            "properties": {key: feature['properties'][key] for key in keep_properties},
+            "geometry": simplify_geometry(feature['geometry'], tolerance, decimals),
+        }
+        if 'id' in feature:
+            simple_feature['id'] = feature['id']
+        simplified.append(simple_feature)
+    return {"type": "FeatureCollection", "features": simplified}
+
+
+@timed()
+def prepare_sector_geometry(sector_json: dict, sector_cities: dict) -> dict:
+    """Per city sector subsets simplified for every configured zoom, with sector id lookup"""
+    try:
+        features = [feature for feature in sector_json['features'] if feature['id'] in sector_cities]
+        lookup = {feature['id']: {"City": sector_cities[feature['id']], "index": i}
+                  for i, feature in enumerate(features)}
+
+        cities = {}
+        for city, (lat, _, zoom) in MAP_PARAMS.items():
+            city_features = features if city == 'Tricity' else \
+                [feature for feature in features if lookup[feature['id']]["City"] == city]
+            # Every zoom used to show this city, finer levels are used when zooming in further
+            zoom_levels = sorted({zoom} | {z for _, _, z in MAP_PARAMS.values() if z > zoom})
+            cities[city] = {z: simplify_collection(city_features, z, lat) for z in zoom_levels}
+        logger.debug("Sector geometry prepared for %d sectors", len(features))
+        return {"sector_lookup": lookup, "cities": cities}
+    except Exception as e:
+        logger.error("Unexpected error occured while preparing sector geometry: %s", e)
+        raise
+
+
+def save_pickle(data, path: str) -> None:
+    """Save object through pickle"""
+    try:
+        with open(path, 'wb') as file:
+            pickle.dump(data, file)
+        logger.debug("Saved %s", path)
+    except Exception as e:
+        logger.error("Unexpected error occured while saving %s: %s", path, e)
+        raise
+
+
+def main():
+    try:
+        sector_json = load_pickle(os.path.join("assets", "geojson", "sector_json.pkl"))
+        map_df = load_pickle(os.path.join("assets", "bin", "map_df.pkl"))
+        sector_cities = dict(zip(map_df['Sector'], map_df['City']))
+        save_pickle(prepare_sector_geometry(sector_json, sector_cities), SECTOR_GEOMETRY_PATH)
+
+        tricity = load_json(os.path.join("assets", "geojson", "tricity.geojson"))
+        lat = MAP_PARAMS["Tricity"][0]
+        # Home map matches features on properties.Name
+        save_pickle({HOME_MAP_ZOOM: simplify_collection(tricity['features'], HOME_MAP_ZOOM, lat, ("Name",))},
+                    TRICITY_GEOMETRY_PATH)
+    except Exception as e:
+        logger.error("Failed to prepare geometry: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import json
+import os
+import time
+import yaml
+from catboost import CatBoostRegressor
+from joblib import Parallel, delayed
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from src.models.model_building import create_transformer, worker_threads
+from utils.features import FEATURE_COLUMNS, TARGET_COLUMN
+from utils.instrumentation import timed
+from utils.logger import get_logger
+
+logger = get_logger('hyperparameter_search')
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        return params
+    except Exception as e:
+        logger.error("Unexpected error occured while loading params file: %s", e)
+        raise
+
+
+@timed()
+def load_data(path: str) -> pd.DataFrame:
+    """Load processed Parquet data from desired path"""
+    try:
+        df = pd.read_parquet(path, columns=FEATURE_COLUMNS + [TARGET_COLUMN])
+        logger.debug("Data loaded from %s", path)
+        return df
+    except Exception as e:
+        logger.error("Unexpected error occured while loading the data: %s", e)
+        raise
+
+
+def sample_trials(search_space: dict, n_trials: int, seed: int) -> list:
+    """Random configurations from search space.
+
+    A list is sampled as choices, a {low, high, log} mapping as a uniform
+    (or log-uniform) float range.
+    """
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(n_trials):
+        trial = {}
+        for name, space in search_space.items():
+            if isinstance(space, list):
+                trial[name] = space[rng.integers(len(space))]
+            elif space.get('log', False):
+                trial[name] = float(np.exp(rng.uniform(np.log(space['low']), np.log(space['high']))))
+            else:
+                trial[name] = float(rng.uniform(space['low'], space['high']))
+        trials.append(trial)
+    return trials
+
+
+def run_trial(trial: dict, X_train: np.ndarray, y_train: pd.Series, X_valid: np.ndarray,
+              y_valid: pd.Series, params: dict, threads: int) -> dict:
+    """Fit CatBoost with trial params, stopping once validation MAE stops improving"""
+    start = time.perf_counter()
+    model = CatBoostRegressor(verbose=False,
+                              iterations=params['max_iterations'],
+                              eval_metric='MAE',
+                              early_stopping_rounds=params['early_stopping_rounds'],
+                              random_seed=params['seed'],
+                              thread_count=threads,
+                              **trial)
+    model.fit(X_train, y_train, eval_set=(X_valid, y_valid))
+    pred = model.predict(X_valid)
+    return {
+        **trial,
+        "iterations": model.get_best_iteration() + 1,
+        "valid_mae": mean_absolute_error(y_valid, pred),
+        "valid_r2": r2_score(y_valid, pred),
+        "runtime_s": time.perf_counter() - start
+    }
+
+
+@timed()
+def search(X: pd.DataFrame, y: pd.Series, params: dict) -> pd.DataFrame:
+    """Run random search trials in parallel, returns leaderboard sorted by validation MAE"""
+    try:
+        X_train, X_valid, y_train, y_valid = train_test_split(
+            X, y, test_size=params['valid_size'], random_state=params['seed'])
+
+        # Preprocessing does not depend on trial params, fit it once on train split
+        preprocessing = Pipeline([('encoding', create_transformer()), ('scaler', StandardScaler())])
+        X_train = preprocessing.fit_transform(X_train)
+        X_valid = preprocessing.transform(X_valid)
+
+        trials = sample_trials(params['search_space'], params['n_trials'], params['seed'])
+        workers, threads = worker_threads(params.get('n_jobs', 1), len(trials))
+        logger.debug("Running %d trials with %d workers x %d threads", len(trials), workers, threads)
+
+        start = time.perf_counter()
+        results = Parallel(n_jobs=workers)(
+            delayed(run_trial)(trial, X_train, y_train, X_valid, y_valid, params, threads) for trial in trials
+        )
+        logger.debug("Search finished in %.1fs", time.perf_counter() - start)
+
+        leaderboard = pd.DataFrame(results).rename_axis('trial').reset_index()
+        return leaderboard.sort_values('valid_mae', ignore_index=True)
+    except Exception as e:
+        logger.error("Unexpected error occured during hyperparameter search: %s", e)
+        raise
+
+
+def best_params(leaderboard: pd.DataFrame, search_space: dict) -> dict:
+    """Winning trial params in the shape of the model_building section of params.yaml"""
+    best = leaderboard.to_dict('records')[0]
+    return {name: best[name] for name in [*search_space, 'iterations']}
+
+
+def main():
+    try:
+        params = load_params('params.yaml')['hyperparameter_search']
+
+        train_data = load_data("./data/processed/data_processed.parquet")
+        X = train_data[FEATURE_COLUMNS]
+        y = train_data[TARGET_COLUMN]
+
+        leaderboard = search(X, y, params)
+
+        os.makedirs("reports", exist_ok=True)
+        leaderboard.to_csv("reports/search_leaderboard.csv", index=False)
+        with open("reports/best_params.json", 'w') as file:
+            json.dump(best_params(leaderboard, params['search_space']), file, indent=4)
+        logger.debug("Best params and leaderboard saved in reports")
+    except Exception as e:
+        logger.error("Failed to run hyperparameter search: %s", e)
+        raise
+
+
+if __name__ == "__main__":
+    main()
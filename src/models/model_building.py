@@ -3,7 +3,10 @@ import pandas as pd
 from sklearn.preprocessing import OrdinalEncoder
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.model_selection import KFold, cross_validate
+from sklearn.model_selection import KFold
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.base import clone
+from joblib import Parallel, delayed
 from sklearn.compose import ColumnTransformer
 from catboost import CatBoostRegressor
 import pickle
@@ -11,6 +14,10 @@ import json
 import os
 import yaml
 import logging
+import time
+from utils.features import FEATURE_COLUMNS, TARGET_COLUMN
+from utils.instrumentation import timed
+from utils.serving_model import export_serving_model
 
 # logging configuration
 logger = logging.getLogger('model_building')
@@ -46,15 +53,13 @@ def load_params(params_path: str) -> int:
         raise
 
 
-def load_data(path:str)-> pd.DataFrame:
-    """Load DataFrame from desired path"""
+@timed()
+def load_data(path:str, columns:list = None)-> pd.DataFrame:
+    """Load processed Parquet data from desired path, reading only given columns"""
     try:
-        df = pd.read_csv(path)
+        df = pd.read_parquet(path, columns=columns)
         logger.debug("Data loaded from %s",path)
         return df
-    except pd.errors.ParserError as e:
-        logger.error('Failed to parse CSV File: %s',e)
-        raise
     except Exception as e:
         logger.error("Unexpected error occured while loading the data: %s",e)
         raise
@@ -95,7 +100,8 @@ def create_model(params:dict)->Pipeline:
             ('cat_boost',CatBoostRegressor(verbose = False,
                                         depth = params['depth'],
                                         iterations = params['iterations'],
-                                        learning_rate = params['learning_rate']))]    
+                                        learning_rate = params['learning_rate'],
+                                        l2_leaf_reg = params.get('l2_leaf_reg', 3)))]    
         )
         logger.debug("Model Created.")
         return model
@@ -104,26 +110,156 @@ def create_model(params:dict)->Pipeline:
         raise
 
 
-def evaluate_model(model : Pipeline, X : pd.DataFrame, y : pd.Series) -> dict:
-    """Evaluate model using kfold crossval""" 
+def worker_threads(n_jobs : int, n_tasks : int) -> tuple:
+    """Number of pool workers for n_tasks and CatBoost threads per worker (-1 n_jobs uses all cores)"""
+    n_cores = os.cpu_count() or 1
+    workers = min(n_tasks, n_cores if n_jobs == -1 else max(1, n_jobs))
+    return workers, max(1, n_cores // workers)
+
+
+def fit_fold(model : Pipeline, X : pd.DataFrame, y : pd.Series, train_idx : np.ndarray,
+             test_idx : np.ndarray = None, threads : int = -1) -> dict:
+    """Fit model with `threads` CatBoost threads on train rows and score it on train and test rows"""
+    model.set_params(cat_boost__thread_count=threads)
+    start = time.perf_counter()
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    fit_time = time.perf_counter() - start
+
+    result = {"model": model, "fit_time": fit_time}
+    if test_idx is not None:
+        start = time.perf_counter()
+        for split, idx in (("train", train_idx), ("test", test_idx)):
+            pred = model.predict(X.iloc[idx])
+            result[f"{split}_r2"] = r2_score(y.iloc[idx], pred)
+            result[f"{split}_mae"] = mean_absolute_error(y.iloc[idx], pred)
+        result["score_time"] = time.perf_counter() - start
+    return result
+
+
+def reset_thread_count(model : Pipeline) -> Pipeline:
+    """Unset thread_count of fitted CatBoost step, like set_params(thread_count=-1) on an unfitted one.
+
+    CatBoost refuses set_params once fitted, so the entry is dropped from its
+    init params, which are what pickling, get_params and clone use.
+    """
+    model.named_steps['cat_boost']._init_params.pop('thread_count', None)
+    return model
+
+
+@timed()
+def evaluate_model(model : Pipeline, X : pd.DataFrame, y : pd.Series, params : dict) -> tuple:
+    """Evaluate model using kfold crossval and fit final model.
+
+    Folds and the final fit on all rows run together in a process pool, each
+    worker gets an equal share of CPU cores as CatBoost threads so cores are
+    not oversubscribed. Returns metrics, fitted model and timings.
+    """
     try:
-        kf = KFold(n_splits=5, shuffle=True, random_state=42)
-        scoring = ['r2', 'neg_mean_absolute_error']
-        scores = cross_validate(model, X, y, cv=kf, scoring=scoring,return_train_score = True)
+        kf = KFold(n_splits=params.get('cv_folds', 5), shuffle=True, random_state=42)
+        folds = list(kf.split(X))
 
+        # folds + final fit
+        workers, threads = worker_threads(params.get('n_jobs', 1), len(folds) + 1)
+
+        start = time.perf_counter()
+        tasks = [(train_idx, test_idx) for train_idx, test_idx in folds] + [(np.arange(len(X)), None)]
+        results = Parallel(n_jobs=workers)(
+            delayed(fit_fold)(clone(model), X, y, train_idx, test_idx, threads) for train_idx, test_idx in tasks
+        )
+        wall_time = time.perf_counter() - start
+
+        fold_results, final = results[:-1], results[-1]
+        # thread share of the CV pool is not meant for serving or later refits
+        final['model'] = reset_thread_count(final['model'])
         metrics = {
-            "Test_MAE": np.expm1(-np.mean(scores['test_neg_mean_absolute_error'])),
-            "Test_R2": np.mean(scores['test_r2']),
-            "Train_MAE": np.expm1(-np.mean(scores['train_neg_mean_absolute_error'])),
-            "Train_R2" : np.mean(scores['train_r2'])
+            "Test_MAE": np.expm1(np.mean([r['test_mae'] for r in fold_results])),
+            "Test_R2": np.mean([r['test_r2'] for r in fold_results]),
+            "Train_MAE": np.expm1(np.mean([r['train_mae'] for r in fold_results])),
+            "Train_R2" : np.mean([r['train_r2'] for r in fold_results])
         }
-        logger.debug("Model Evaluated.")
-        return metrics
+        timings = {
+            "wall_time_s": wall_time,
+            "workers": workers,
+            "catboost_threads": threads,
+            "final_fit_time_s": final['fit_time'],
+            "folds": [
+                {"fold": i, "fit_time_s": r['fit_time'], "score_time_s": r['score_time']}
+                for i, r in enumerate(fold_results)
+            ]
+        }
+        logger.debug("Model Evaluated in %.1fs with %d workers x %d threads.", wall_time, workers, threads)
+        return metrics, final['model'], timings
     except Exception as e:
         logger.error("Unexpected error occured while evaluating model %s",e)
         raise
 
 
+def load_json(path : str) -> dict:
+    """Load JSON file, empty dict if it does not exist"""
+    try:
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as file:
+            return json.load(file)
+    except Exception as e:
+        logger.error("Unexpected error occured while loading %s: %s",path,e)
+        raise
+
+
+# Params that change the fitted model, the others only change how or when it is built
+MODEL_PARAMS = ['depth', 'iterations', 'learning_rate', 'l2_leaf_reg']
+
+
+def model_params(params : dict) -> dict:
+    """Hyperparameters of model_building params a warm start has to share with the previous model"""
+    return {key: params.get(key) for key in MODEL_PARAMS}
+
+
+def load_model(path : str) -> Pipeline:
+    """Load pickled model"""
+    try:
+        with open(path,'rb') as file:
+            return pickle.load(file)
+    except Exception as e:
+        logger.error("Unexpected error occured while loading model %s",e)
+        raise
+
+
+@timed()
+def warm_start_model(model : Pipeline, X : pd.DataFrame, y : pd.Series, params : dict) -> tuple:
+    """Continue boosting previous model on new rows.
+
+    Encoders and scaler stay fitted on earlier data. Metrics only cover the
+    new rows, so they are not comparable with the CV metrics of a full run:
+    the previous model scored on the unseen rows and the updated model on
+    the rows it was fitted on. Returns metrics and updated model.
+    """
+    try:
+        pred = model.predict(X)
+        metrics = {"New_Rows_Previous_MAE": np.expm1(mean_absolute_error(y, pred)),
+                   "New_Rows_Previous_R2": r2_score(y, pred)}
+
+        start = time.perf_counter()
+        booster = CatBoostRegressor(verbose = False,
+                                    depth = params['depth'],
+                                    iterations = params['warm_start_iterations'],
+                                    learning_rate = params['learning_rate'],
+                                    l2_leaf_reg = params.get('l2_leaf_reg', 3))
+        booster.fit(model[:-1].transform(X), y, init_model=model.named_steps['cat_boost'])
+        model.steps[-1] = ('cat_boost', booster)
+        fit_time = time.perf_counter() - start
+
+        pred = model.predict(X)
+        metrics.update({"New_Rows_Updated_MAE": np.expm1(mean_absolute_error(y, pred)),
+                        "New_Rows_Updated_R2": r2_score(y, pred), "rows": len(X), "fit_time_s": fit_time})
+        logger.debug("Model warm started on %d rows in %.1fs.", len(X), fit_time)
+        return metrics, model
+    except Exception as e:
+        logger.error("Unexpected error occured while warm starting model %s",e)
+        raise
+
+
+@timed()
 def save_model(model : Pipeline, path : str)->None:
     """Save model through pickle"""
     try:
@@ -150,29 +286,55 @@ def main():
         # Load Params
         params = load_params('params.yaml')['model_building']
 
-        # Load Data
-        train_data = load_data("./data/processed/data_processed.csv")
+        # Partitions the previous model was trained on
+        manifest = load_json("./data/processed/manifest.json")
+        state = load_json("models/train_state.json")
+        partitions = [partition['hash'] for partition in manifest.get('partitions', [])]
+        new_partitions = [digest for digest in partitions if digest not in set(state.get('partitions', []))]
 
-        #Split Data in X and Y
-        X = train_data.iloc[:,:-1]
-        y = train_data.iloc[:,-1]
+        # data processed differently than the previous model saw needs a full rebuild
+        warm_start = (params['warm_start'] and new_partitions
+                      and model_params(state.get('params', {})) == model_params(params)
+                      and state.get('version') == manifest.get('version')
+                      and state.get('warm_starts', 0) < params['full_rebuild_every'])
+        if warm_start:
+            # Continue previous model with rows of new partitions
+            new_data = pd.concat([load_data(f"./data/processed/partitions/{digest}.parquet",
+                                            FEATURE_COLUMNS + [TARGET_COLUMN]) for digest in new_partitions])
+            model = load_model("models/model.pkl")
+            warm_metrics, model = warm_start_model(model, new_data[FEATURE_COLUMNS], new_data[TARGET_COLUMN], params)
+            warm_starts = state.get('warm_starts', 0) + 1
+        else:
+            # Load Data
+            train_data = load_data("./data/processed/data_processed.parquet", FEATURE_COLUMNS + [TARGET_COLUMN])
 
-        # Create and evaluate model
-        model = create_model(params)
-        metrics = evaluate_model(model,X,y)
+            #Split Data in X and Y
+            X = train_data[FEATURE_COLUMNS]
+            y = train_data[TARGET_COLUMN]
 
-        # Train Model
-        model.fit(X,y)
+            # Create, evaluate and train model
+            model = create_model(params)
+            metrics, model, timings = evaluate_model(model,X,y,params)
+            warm_starts = 0
 
         # Make Directory to save Model
-        os.makedirs("models")
+        os.makedirs("models", exist_ok=True)
 
         # Save Model and Metrics
         save_model(model, "models/model.pkl")
-        save_metrics(metrics,"reports/metrics.json")
+        export_serving_model(model, "models")
+        if warm_start:
+            # CV metrics and timings of the last full run stay as they are
+            save_metrics({"warm_starts": warm_starts, **warm_metrics}, "reports/warm_start_metrics.json")
+        else:
+            save_metrics(metrics,"reports/metrics.json")
+            save_metrics(timings,"reports/cv_timings.json")
+            save_metrics({"warm_starts": 0}, "reports/warm_start_metrics.json")
+        save_metrics({"partitions": partitions, "version": manifest.get('version'), "warm_starts": warm_starts,
+                      "params": params}, "models/train_state.json")
     except Exception as e:
         logger.error("Failed to Create Model: %s",e)
-        print(f"Error: {e}")
+        raise
 
 
 if __name__ == "__main__":
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.features import FEATURE_COLUMNS
+
+# model_building logs to logs/ relative to the working directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+os.makedirs("logs", exist_ok=True)
+
+from src.models.model_building import create_model, create_transformer  # noqa: E402
+
+
+def make_listings(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random listings as the model sees them (log Area), every ordered column has known categories"""
+    rng = np.random.default_rng(seed)
+    _, ordered, ordered_cols = create_transformer().transformers[0]
+    df = pd.DataFrame({
+        'property_type': rng.choice(['flat', 'house'], n),
+        'Sector': rng.choice([f'sector {i}' for i in range(20)], n),
+        'City': rng.choice(['Gurgaon', 'Noida', 'Delhi'], n),
+        'Area': np.log(rng.uniform(300, 5000, n).round()),
+        'bedRoom': rng.integers(1, 6, n),
+        'bathroom': rng.integers(1, 6, n),
+        'balcony': rng.integers(0, 4, n),
+        'facing': rng.choice(['North', 'South', 'East', 'West'], n),
+        'FloorNo': rng.integers(0, 30, n),
+        'FloorRise': rng.choice(['Low Rise', 'Mid Rise', 'High Rise'], n),
+        'Flooring': rng.choice(['Vitrified', 'Marble', 'Wooden'], n),
+        'CoveredParking': rng.integers(0, 3, n),
+        'OpenParking': rng.integers(0, 3, n),
+    })
+    for col, categories in zip(ordered_cols, ordered.categories):
+        df[col] = rng.choice(categories, n)
+    return df[FEATURE_COLUMNS]
+
+
+@pytest.fixture(scope="session")
+def listings() -> pd.DataFrame:
+    return make_listings(300)
+
+
+@pytest.fixture(scope="session")
+def pipeline(listings):
+    """Small fitted training pipeline, log price grows with Area"""
+    rng = np.random.default_rng(1)
+    y = listings['Area'] - 4.6 + 0.1 * listings['bedRoom'] + rng.normal(0, 0.1, len(listings))
+    model = create_model({'depth': 4, 'iterations': 50, 'learning_rate': 0.3})
+    model.set_params(cat_boost__allow_writing_files=False)
+    return model.fit(listings, y)
@@ -0,0 +1,40 @@
+import os
+import pickle
+
+from utils.assets import AssetRegistry
+
+
+def write(path, data) -> None:
+    with open(path, 'wb') as file:
+        pickle.dump(data, file)
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = str(tmp_path / "asset.pkl")
+    write(path, [1])
+    registry = AssetRegistry()
+    assert registry.get(path) == [1]
+    write(path, [1, 2])
+    assert registry.get(path) == [1, 2]
+    assert registry.stats()[0]["loads"] == 2
+
+
+def test_version_follows_file_changes(tmp_path):
+    path = str(tmp_path / "asset.pkl")
+    write(path, [1])
+    registry = AssetRegistry()
+    first = registry.version(path)
+    write(path, [1, 2])
+    # version is read before the file is loaded again, e.g. for a figure cache key
+    assert registry.version(path) != first
+
+
+def test_touched_file_keeps_version(tmp_path):
+    path = str(tmp_path / "asset.pkl")
+    write(path, [1])
+    registry = AssetRegistry()
+    first = registry.version(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.version(path) == first
+    assert registry.stats()[0]["loads"] == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import batch_scoring
+from utils.batch_scoring import PREDICTION_COLUMN, score_file
+from utils.inference_executor import InferenceExecutor
+from utils.serving_model import CompactModel
+
+
+def test_scores_file_in_chunks_and_skips_invalid_rows(pipeline, listings, tmp_path):
+    src, dst = tmp_path / "listings.csv", tmp_path / "scored.csv"
+    raw = listings.head(100).copy()
+    raw['Area'] = np.exp(raw['Area']).round(2)
+    raw = raw.astype({'Area': object, 'agePossession': object})
+    raw.loc[3, 'Area'] = 'n/a'
+    raw.loc[7, 'agePossession'] = 'Someday'
+    raw.loc[11, 'Area'] = 0
+    raw.to_csv(src, index=False)
+
+    model = CompactModel.from_pipeline(pipeline)
+    progress = []
+    result = score_file(str(src), str(dst), model, chunksize=30, progress=lambda *args: progress.append(args))
+
+    scored = pd.read_csv(dst)
+    assert result["rows"] == len(scored) == 100 and result["skipped"] == 3
+    assert scored[PREDICTION_COLUMN].isna().to_numpy().nonzero()[0].tolist() == [3, 7, 11]
+    assert [rows for rows, _ in progress] == [30, 60, 90, 100] and progress[-1][1] == 1.0
+
+    valid = scored[PREDICTION_COLUMN].notna()
+    X = scored.loc[valid, listings.columns].copy()
+    X['Area'] = np.log(X['Area'].astype(float))
+    np.testing.assert_allclose(scored.loc[valid, PREDICTION_COLUMN], np.expm1(pipeline.predict(X)), rtol=1e-9)
+
+
+def test_missing_columns_are_rejected(pipeline, listings, tmp_path):
+    src = tmp_path / "listings.csv"
+    listings.drop(columns=['Sector']).to_csv(src, index=False)
+    with pytest.raises(ValueError, match="Sector"):
+        score_file(str(src), str(tmp_path / "scored.csv"), pipeline)
+
+
+def test_chunks_run_on_inference_executor(pipeline, listings, tmp_path):
+    src, dst = tmp_path / "listings.csv", tmp_path / "scored.csv"
+    raw = listings.head(50).copy()
+    raw['Area'] = np.exp(raw['Area'])
+    raw.to_csv(src, index=False)
+
+    executor = InferenceExecutor(workers=1, threads=2)
+    # the pickled pipeline passes thread_count on to CatBoost like the compact model
+    predict = lambda X: executor.run(lambda threads: pipeline.predict(X, thread_count=threads))
+    result = score_file(str(src), str(dst), pipeline, chunksize=20, predict=predict)
+    assert result == {**result, "rows": 50, "skipped": 0}
+    assert executor.stats()["completed"] == 3
+
+
+def test_model_domain_is_computed_once_per_file(pipeline, listings, tmp_path, monkeypatch):
+    src = tmp_path / "listings.csv"
+    raw = listings.head(50).copy()
+    raw['Area'] = np.exp(raw['Area'])
+    raw.to_csv(src, index=False)
+
+    calls = []
+    domain = batch_scoring.feature_domain
+    monkeypatch.setattr(batch_scoring, "feature_domain", lambda model: calls.append(model) or domain(model))
+    score_file(str(src), str(tmp_path / "scored.csv"), pipeline, chunksize=10)
+    assert len(calls) == 1
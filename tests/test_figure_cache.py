@@ -0,0 +1,36 @@
+import plotly.graph_objects as go
+
+from utils.figure_cache import FigureCache
+
+
+def figure(n: int) -> go.Figure:
+    return go.Figure(go.Scatter(x=list(range(n)), y=list(range(n))))
+
+
+def test_evicts_least_recently_used_above_max_bytes():
+    small = figure(10)
+    size = len(small.to_json())
+    cache = FigureCache(max_bytes=2 * size)
+    cache.put('a', small)
+    cache.put('b', figure(10))
+    assert cache.get('a') is small
+    cache.put('c', figure(10))
+    assert cache.get('b') is None
+    assert cache.get('a') is small and cache.get('c') is not None
+    stats = cache.stats()
+    assert stats["figures"] == 2 and stats["bytes"] == 2 * size and stats["evictions"] == 1
+
+
+def test_figure_larger_than_cache_is_not_stored():
+    cache = FigureCache(max_bytes=100)
+    cache.put('a', figure(100))
+    assert cache.get('a') is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_replacing_key_keeps_byte_count():
+    cache = FigureCache()
+    cache.put('a', figure(10))
+    cache.put('a', figure(20))
+    assert cache.stats()["figures"] == 1
+    assert cache.stats()["bytes"] == len(figure(20).to_json())
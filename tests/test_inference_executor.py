@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+
+from utils.inference_executor import InferenceExecutor, Overloaded
+
+
+def blocked(executor: InferenceExecutor) -> threading.Event:
+    """Occupy the only worker until the returned event is set"""
+    release, started = threading.Event(), threading.Event()
+    executor.submit(lambda threads: started.set() or release.wait(5))
+    assert started.wait(5)
+    return release
+
+
+def test_run_passes_thread_budget():
+    executor = InferenceExecutor(workers=1, threads=3)
+    assert executor.run(lambda threads: threads * 2) == 6
+    assert executor.stats()["completed"] == 1
+
+
+def test_rejects_when_queue_is_full():
+    executor = InferenceExecutor(workers=1, threads=1, max_queue=1)
+    release = blocked(executor)
+    executor.submit(lambda threads: None)
+    with pytest.raises(Overloaded):
+        executor.submit(lambda threads: None)
+    release.set()
+    assert executor.stats()["rejected"] == 1
+
+
+def test_timeout_cancels_queued_task():
+    executor = InferenceExecutor(workers=1, threads=1)
+    release = blocked(executor)
+    ran = []
+    with pytest.raises(TimeoutError):
+        executor.run(lambda threads: ran.append(threads), timeout=0.05)
+    release.set()
+    assert executor.run(lambda threads: "done") == "done"
+    assert ran == [] and executor.stats()["timeouts"] == 1
+
+
+def test_task_errors_reach_caller():
+    executor = InferenceExecutor(workers=1, threads=1)
+
+    def fail(threads):
+        raise ValueError("bad listing")
+
+    with pytest.raises(ValueError, match="bad listing"):
+        executor.run(fail)
+    assert executor.run(lambda threads: 1) == 1
+    assert executor.stats()["errors"] == 1
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from utils.inference_server import MicroBatcher, validate_listing
+from utils.serving_model import CompactModel
+
+
+@pytest.fixture
+def batcher(pipeline):
+    return MicroBatcher(CompactModel.from_pipeline(pipeline), max_delay=0.05)
+
+
+def request(listings, i: int = 0) -> dict:
+    listing = listings.iloc[i].to_dict()
+    listing['Area'] = float(np.exp(listing['Area']))
+    return listing
+
+
+def test_validate_listing(batcher, listings):
+    listing = request(listings)
+    validate_listing(listing, batcher.domain)
+    for field, value, message in [('Area', 'big', 'Area must be a number'),
+                                  ('bedRoom', True, 'bedRoom must be a number'),
+                                  ('Area', -5.0, 'Area must be positive'),
+                                  ('Furnishing', 'Gold plated', 'Unknown Furnishing'),
+                                  ('City', ['Noida'], 'City must be a string'),
+                                  ('Sector', 12, 'Sector must be a string'),
+                                  ('City', None, 'Missing required fields: City')]:
+        with pytest.raises(ValueError, match=message):
+            validate_listing({**listing, field: value}, batcher.domain)
+    with pytest.raises(ValueError, match="JSON object"):
+        validate_listing([listing])
+
+
+def test_failed_batch_only_fails_bad_request(batcher, listings):
+    good = [batcher.submit(request(listings, i)) for i in range(4)]
+    bad = batcher.submit({**request(listings, 4), 'Furnishing': 'Gold plated'})
+    results = [future.result(5) for future in good]
+    with pytest.raises(ValueError, match="Furnishing"):
+        bad.result(5)
+    np.testing.assert_allclose(results, np.expm1(batcher.model.predict(listings.head(4))), rtol=1e-6)
+    stats = batcher.stats()
+    assert stats["requests"] == 5 and stats["failed_requests"] == 1 and stats["failed_batches"] >= 1
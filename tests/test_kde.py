@@ -0,0 +1,30 @@
+import numpy as np
+
+from utils.kde import binned_kde, scott_bandwidth
+
+
+def test_matches_direct_kde_on_bin_centers():
+    rng = np.random.default_rng(0)
+    edges = np.linspace(0, 10, 201)
+    centers = (edges[:-1] + edges[1:]) / 2
+    counts, _ = np.histogram(rng.normal(5, 1, 5000), edges)
+    bandwidth = scott_bandwidth(1.0, 5000)
+
+    # every observation sits on its bin center
+    kernel = np.exp(-0.5 * ((centers[:, None] - centers[None, :]) / bandwidth) ** 2)
+    expected = kernel @ counts / (counts.sum() * bandwidth * np.sqrt(2 * np.pi))
+    np.testing.assert_allclose(binned_kde(counts, edges, bandwidth), expected, atol=1e-4 * expected.max())
+
+
+def test_integrates_to_one():
+    edges = np.linspace(0, 10, 501)
+    counts = np.zeros(500)
+    counts[[100, 250, 260]] = [5, 10, 3]
+    density = binned_kde(counts, edges, 0.3)
+    assert abs(density.sum() * (edges[1] - edges[0]) - 1) < 1e-3
+    assert (density >= 0).all()
+
+
+def test_empty_histogram():
+    edges = np.linspace(0, 1, 11)
+    assert not binned_kde(np.zeros(10), edges, 0.1).any()
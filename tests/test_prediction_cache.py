@@ -0,0 +1,52 @@
+import numpy as np
+
+from utils import prediction_cache as module
+from utils.prediction_cache import PredictionCache, normalize_features
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.put(('a',), 1, 1.0)
+    cache.put(('b',), 1, 2.0)
+    assert cache.get(('a',), 1) == 1.0
+    cache.put(('c',), 1, 3.0)
+    # b is the least recently used once a was read
+    assert cache.get(('b',), 1) is None
+    assert cache.get(('a',), 1) == 1.0 and cache.get(('c',), 1) == 3.0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+    cache = PredictionCache(ttl=10)
+    cache.put(('a',), 1, 1.0)
+    now[0] += 10
+    assert cache.get(('a',), 1) == 1.0
+    now[0] += 0.5
+    assert cache.get(('a',), 1) is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["size"] == 0
+
+
+def test_new_version_drops_entries():
+    cache = PredictionCache()
+    cache.put(('a',), "v1", 1.0)
+    assert cache.get(('a',), "v2") is None
+    assert cache.get(('a',), "v1") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    cache = PredictionCache()
+    calls = []
+    compute = lambda: calls.append(1) or 5.0
+    assert cache.get_or_compute(('flat', np.float64(7.0)), 1, compute) == 5.0
+    # numpy and python values of the same features share an entry
+    assert cache.get_or_compute(('flat', 7.0 + 1e-12), 1, compute) == 5.0
+    assert len(calls) == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "evictions": 0,
+                             "expirations": 0, "invalidations": 0}
+
+
+def test_normalize_features():
+    assert normalize_features((np.int32(3), np.float64(0.1 + 0.2), 'a')) == (3, 0.3, 'a')
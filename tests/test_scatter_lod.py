@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from utils.scatter_lod import density_sample, downsample, grid_cells, outlier_scores
+
+
+def listings(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    area = np.exp(rng.normal(7, 0.3, n))
+    return pd.DataFrame({"Area": area, "price": area * np.exp(rng.normal(-9, 0.2, n))})
+
+
+def test_density_sample_fills_budget_and_keeps_every_cell():
+    rng = np.random.default_rng(0)
+    # one dense cell and many sparse ones
+    cells = np.concatenate([np.zeros(900, dtype=np.int64), rng.integers(1, 50, 100)])
+    sample = density_sample(cells, 200)
+    assert len(sample) == 200 and len(np.unique(sample)) == 200
+    assert set(np.unique(cells[sample])) == set(np.unique(cells))
+    # dense cell gets one row plus its share of the rows left after one per cell
+    occupied = len(np.unique(cells))
+    assert abs((cells[sample] == 0).sum() - (1 + 0.9 * (200 - occupied))) <= 2
+
+
+def test_density_sample_small_budget_and_small_input():
+    cells = np.arange(100)
+    assert len(density_sample(cells, 10)) == 10
+    assert len(density_sample(cells, 500)) == 100
+    assert len(density_sample(cells, 0)) == 0
+
+
+def test_downsample_keeps_outliers_and_caps_size():
+    df = listings(20_000)
+    df.loc[[5, 50], 'price'] *= 1000
+    rows, outliers = downsample(df, 'Area', 'price', max_points=1000, max_outliers=100)
+    assert len(rows) == 1000 and 2 <= outliers <= 100
+    assert {5, 50} <= set(rows.index)
+    assert rows.index.is_monotonic_increasing
+
+
+def test_downsample_returns_small_frames_whole():
+    df = listings(100)
+    rows, outliers = downsample(df, 'Area', 'price', max_points=1000)
+    assert rows is df and outliers == 0
+
+
+def test_grid_cells_and_outlier_scores():
+    df = listings(1000)
+    cells = grid_cells(df, 'Area', 'price', 8)
+    assert cells.min() >= 0 and cells.max() < 64
+    df.loc[0, 'Area'] = 1e9
+    scores = outlier_scores(df, 'Area', 'price')
+    assert scores[0] == scores.max() > 0
@@ -0,0 +1,65 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from tests.conftest import make_listings
+from utils.serving_model import CompactModel, export_serving_model, feature_domain, load_serving_model
+
+
+def test_predict_matches_pipeline(pipeline, listings):
+    fast = CompactModel.from_pipeline(pipeline)
+    np.testing.assert_allclose(fast.predict(listings), pipeline.predict(listings), rtol=0, atol=1e-9)
+
+
+def test_predict_one_matches_pipeline(pipeline, listings):
+    fast = CompactModel.from_pipeline(pipeline)
+    expected = pipeline.predict(listings)
+    rows = listings.itertuples(index=False, name=None)
+    np.testing.assert_allclose([fast.predict_one(row) for row in rows], expected, rtol=0, atol=1e-9)
+    assert fast.predict_one(listings.iloc[0].to_dict()) == pytest.approx(expected[0], abs=1e-9)
+
+
+def test_unseen_listings_match_pipeline(pipeline):
+    # unknown sector falls back to the unknown code like the pipeline encoder
+    fresh = make_listings(50, seed=7)
+    fresh.loc[:10, 'Sector'] = 'sector 999'
+    fast = CompactModel.from_pipeline(pipeline)
+    np.testing.assert_allclose(fast.predict(fresh), pipeline.predict(fresh), rtol=0, atol=1e-9)
+
+
+def test_unknown_strict_category_raises(pipeline, listings):
+    fast = CompactModel.from_pipeline(pipeline)
+    bad = listings.head(3).copy()
+    column = next(iter(feature_domain(fast)[0]))
+    bad[column] = 'not a category'
+    with pytest.raises(ValueError, match=column):
+        fast.predict(bad)
+    with pytest.raises(ValueError, match=column):
+        fast.predict_one(bad.iloc[0].to_dict())
+
+
+def test_exported_model_matches_pipeline(pipeline, listings, tmp_path):
+    export_serving_model(pipeline, str(tmp_path))
+    loaded = load_serving_model(str(tmp_path))
+    assert isinstance(loaded, CompactModel)
+    np.testing.assert_allclose(loaded.predict(listings), pipeline.predict(listings), rtol=0, atol=1e-9)
+
+
+def test_feature_domain_of_pipeline_and_compact_model(pipeline):
+    strict, numeric = feature_domain(pipeline)
+    assert feature_domain(CompactModel.from_pipeline(pipeline)) == (strict, numeric)
+    assert set(strict) == {'agePossession', 'Furnishing', 'PowerBackup', 'Facilities Categories'}
+    assert 'Area' in numeric and 'Sector' not in numeric
+
+
+def test_evaluated_model_keeps_default_thread_count(listings):
+    from src.models.model_building import create_model, evaluate_model
+
+    y = listings['Area'] - 4.6
+    params = {'depth': 2, 'iterations': 5, 'learning_rate': 0.3, 'cv_folds': 2, 'n_jobs': 1}
+    model = create_model(params).set_params(cat_boost__allow_writing_files=False)
+    _, fitted, timings = evaluate_model(model, listings, y, params)
+    assert timings['catboost_threads'] >= 1
+    assert 'thread_count' not in fitted.named_steps['cat_boost'].get_params()
+    assert 'thread_count' not in pickle.loads(pickle.dumps(fitted)).named_steps['cat_boost'].get_params()
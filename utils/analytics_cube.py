@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from utils.assets import get_asset, registry
+from utils.kde import binned_kde, scott_bandwidth
+
+CUBE_PATH = 'assets/bin/analytics_cube.pkl'
+ALL_CITIES = 'Tricity'
+ALL_TYPES = 'All'
+
+
+def get_analytics_cube(path: str = CUBE_PATH) -> dict:
+    """Get pre-aggregated analytics cube built by the analytics_cube DVC stage"""
+    return get_asset(path)
+
+
+def _scope(table: pd.DataFrame, city: str, property_type: str) -> pd.DataFrame:
+    return table[(table['City'] == city) & (table['property_type'] == property_type)]
+
+
+def bedroom_counts(cube: dict, city: str = ALL_CITIES, property_type: str = ALL_TYPES) -> pd.DataFrame:
+    """Listing count per bedRoom for a City x property_type scope"""
+    return _scope(cube['bedroom_counts'], city, property_type)[['bedRoom', 'count']]
+
+
+def sector_bedroom_counts(cube: dict, sector: str) -> pd.DataFrame:
+    """Listing count per bedRoom in a sector"""
+    table = cube['sector_bedroom_counts']
+    return table[table['Sector'] == sector][['bedRoom', 'count']]
+
+
+def bedroom_box_stats(cube: dict, city: str = ALL_CITIES, property_type: str = ALL_TYPES) -> tuple:
+    """Price quartiles/whiskers and outliers per bedRoom for a City x property_type scope"""
+    return (_scope(cube['box_stats'], city, property_type),
+            _scope(cube['box_outliers'], city, property_type))
+
+
+def price_kde_curves(cube: dict, city: str = ALL_CITIES) -> pd.DataFrame:
+    """Price density per property_type in a city from binned histograms.
+
+    Curves are scaled by the share of each property_type like seaborn's
+    kdeplot with hue (common_norm=True).
+    """
+    edges = cube['price_hist_edges']
+    centers = (edges[:-1] + edges[1:]) / 2
+    stats = cube['price_stats']
+    stats = stats[(stats['City'] == city) & (stats['property_type'] != ALL_TYPES)]
+    total = stats['count'].sum()
+
+    curves = []
+    last_bin = 0
+    for row in stats.itertuples():
+        counts = cube['price_hist'][(city, row.property_type)]
+        bandwidth = scott_bandwidth(row.std, row.count)
+        density = binned_kde(counts, edges, bandwidth) * row.count / total
+        curves.append(pd.DataFrame({"price": centers, "density": density, "property_type": row.property_type}))
+        # grid only needs to cover data plus the kernel tail
+        last_bin = max(last_bin, np.flatnonzero(counts).max() + int(np.ceil(3 * bandwidth / (edges[1] - edges[0]))))
+
+    curves = pd.concat(curves, ignore_index=True)
+    return curves[curves['price'] <= centers[min(last_bin, len(centers) - 1)]]
+
+
+def get_price_kde(city: str, path: str = CUBE_PATH) -> pd.DataFrame:
+    """Get price KDE curves of a city, computed once per cube version"""
+    return registry.derived(path, f"price_kde:{city}", lambda cube: price_kde_curves(cube, city))
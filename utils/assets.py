@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+from utils.instrumentation import timed
+from utils.logger import get_logger
+
+logger = get_logger('assets')
+
+
+@timed("load_pickle")
+def load_pickle(file_path: str):
+    """Load Pickle Files"""
+    with open(file_path, 'rb') as file:
+        data = pickle.load(file)
+    return data
+
+
+@timed("load_json")
+def load_json(file_path: str):
+    """Load JSON/GeoJSON Files"""
+    with open(file_path, 'r') as file:
+        data = json.load(file)
+    return data
+
+
+@timed("load_arrow")
+def load_arrow(file_path: str):
+    """Load Arrow IPC file as DataFrame, memory mapped read only.
+
+    Numeric and categorical columns are views on the mapped file, so every
+    process using the file shares one copy of it through the page cache.
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(file_path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    # one block per column, otherwise pandas copies columns into 2D blocks
+    return table.to_pandas(split_blocks=True)
+
+
+# Loader used for every file suffix, other formats can be registered with register_loader
+LOADERS = {
+    ".pkl": load_pickle,
+    ".arrow": load_arrow,
+    ".json": load_json,
+    ".geojson": load_json,
+}
+
+
+def register_loader(suffix: str, loader) -> None:
+    """Register loader function for a file suffix"""
+    LOADERS[suffix] = loader
+
+
+def file_hash(file_path: str) -> str:
+    """Get md5 hash of file content"""
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def estimate_size(obj, _seen: set = None) -> int:
+    """Estimate memory used by loaded object in bytes"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    # pandas objects know their own (deep) memory usage
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, "memory_usage") and hasattr(obj, "index"):
+        return int(obj.memory_usage(deep=True))
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    return size
+
+
+class Asset:
+    """Loaded artifact along with file version and load statistics"""
+
+    def __init__(self, path: str, data, stat: tuple, digest: str, load_time: float, memory: int):
+        self.path = path
+        self.data = data
+        self.stat = stat
+        self.digest = digest
+        self.load_time = load_time
+        self.memory = memory
+        self.loads = 1
+
+
+class AssetRegistry:
+    """Process wide cache of artifacts shared by all sessions and pages.
+
+    Every artifact is loaded once per process. On each access the file is
+    stat'ed and only when mtime/size changed the content hash is compared,
+    the artifact is reloaded only if the hash differs.
+    """
+
+    def __init__(self):
+        self._assets = {}
+        self._derived = {}
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _stat(path: str) -> tuple:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, path: str, loader) -> Asset:
+        if loader is None:
+            suffix = os.path.splitext(path)[1]
+            try:
+                loader = LOADERS[suffix]
+            except KeyError:
+                logger.error("No loader registered for %s", path)
+                raise
+        try:
+            stat = self._stat(path)
+            digest = file_hash(path)
+            start = time.perf_counter()
+            data = loader(path)
+            load_time = time.perf_counter() - start
+        except Exception as e:
+            logger.error("Unexpected error occured while loading asset %s: %s", path, e)
+            raise
+
+        memory = estimate_size(data)
+        logger.debug("Loaded %s in %.3fs (%.2f MB)", path, load_time, memory / 2**20)
+        return Asset(path, data, stat, digest, load_time, memory)
+
+    def get(self, path: str, loader=None):
+        """Get artifact from cache, load or reload it if required"""
+        path = os.path.normpath(path)
+        asset = self._assets.get(path)
+        if asset is not None and asset.stat == self._stat(path):
+            return asset.data
+
+        with self._path_lock(path):
+            # Other session may have already loaded it while waiting
+            asset = self._assets.get(path)
+            stat = self._stat(path)
+            if asset is not None and asset.stat == stat:
+                return asset.data
+
+            if asset is not None and file_hash(path) == asset.digest:
+                # File touched but content unchanged
+                asset.stat = stat
+                return asset.data
+
+            new_asset = self._load(path, loader)
+            if asset is not None:
+                new_asset.loads = asset.loads + 1
+                logger.debug("Reloaded %s after file change", path)
+            self._assets[path] = new_asset
+            return new_asset.data
+
+    def derived(self, path: str, name: str, builder):
+        """Get object built from an artifact (index, aggregate...), rebuilt only when artifact changes"""
+        data = self.get(path)
+        path = os.path.normpath(path)
+        digest = self._assets[path].digest
+        entry = self._derived.get((path, name))
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+
+        with self._path_lock(path):
+            entry = self._derived.get((path, name))
+            if entry is not None and entry[0] == digest:
+                return entry[1]
+            start = time.perf_counter()
+            value = builder(data)
+            logger.debug("Built %s for %s in %.3fs", name, path, time.perf_counter() - start)
+            self._derived[(path, name)] = (digest, value)
+            return value
+
+    def version(self, path: str) -> str:
+        """Get content hash of artifact, used to invalidate derived caches.
+
+        Goes through get() so a changed file is reloaded before its hash is
+        used in cache keys of objects built from it.
+        """
+        self.get(path)
+        return self._assets[os.path.normpath(path)].digest
+
+    def stats(self) -> list:
+        """Report load time and memory per loaded artifact"""
+        return [
+            {
+                "path": asset.path,
+                "load_time_s": round(asset.load_time, 4),
+                "memory_mb": round(asset.memory / 2**20, 3),
+                "loads": asset.loads,
+                "hash": asset.digest,
+            }
+            for asset in self._assets.values()
+        ]
+
+    def clear(self) -> None:
+        """Drop all loaded artifacts"""
+        with self._lock:
+            self._assets.clear()
+            self._derived.clear()
+
+
+# Single registry for the whole process, modules are only imported once so it
+# survives streamlit reruns and is shared between sessions
+registry = AssetRegistry()
+
+
+def get_asset(path: str, loader=None):
+    """Get artifact from process wide registry"""
+    return registry.get(path, loader)
+
+
+# Builds the page artifacts that are DVC outputs (not committed, a fresh clone has none of them)
+BUILD_ASSETS_COMMAND = "dvc repro analytics_cube geometry_preparation listings arrow_assets"
+
+
+def missing_assets(paths) -> list:
+    """Paths of artifacts that don't exist"""
+    return [path for path in paths if not os.path.exists(path)]
+
+
+def require_assets(paths) -> None:
+    """Stop the page with an error naming the build command if any of its artifacts is missing"""
+    missing = missing_assets(paths)
+    if not missing:
+        return
+    import streamlit as st
+
+    logger.error("Missing assets: %s", ", ".join(missing))
+    st.error(f"This page needs build outputs which don't exist yet: {', '.join(f'`{path}`' for path in missing)}. "
+             f"Build them with `{BUILD_ASSETS_COMMAND}` and reload the page.")
+    st.stop()
+
+
+def asset_stats() -> list:
+    """Get load statistics of all artifacts in registry"""
+    return registry.stats()
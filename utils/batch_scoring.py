@@ -0,0 +1,114 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.features import FEATURE_COLUMNS
+from utils.logger import get_logger
+from utils.serving_model import feature_domain, load_serving_model
+
+logger = get_logger('batch_scoring')
+
+PREDICTION_COLUMN = 'predicted_price'
+
+
+def validate_columns(columns) -> None:
+    """Check that listings file contains all the columns required by model"""
+    missing = [col for col in FEATURE_COLUMNS if col not in columns]
+    if missing:
+        logger.error("Listings file is missing columns: %s", missing)
+        raise ValueError(f"Listings file is missing required columns: {', '.join(missing)}")
+
+
+def prepare_chunk(chunk: pd.DataFrame, domain: tuple) -> tuple:
+    """Select model columns, apply log transform on Area and flag rows which can't be scored.
+
+    Rows with missing or non numeric values, non positive Area or a category
+    the model can't encode (see `feature_domain`) are not scored.
+    """
+    X = chunk[FEATURE_COLUMNS].copy()
+    categories, numeric = domain
+    for col in numeric:
+        X[col] = pd.to_numeric(X[col], errors='coerce')
+    valid = X.notna().all(axis=1) & (X['Area'] > 0)
+    for col, allowed in categories.items():
+        valid &= X[col].isin(allowed)
+    X['Area'] = np.log(X['Area'].where(valid, 1.0))
+    return X[valid], valid.to_numpy()
+
+
+def score_chunk(chunk: pd.DataFrame, model, predict=None, domain: tuple = None) -> pd.DataFrame:
+    """Predict price(Cr INR) of every listing in chunk, invalid rows are left as NaN.
+
+    `predict` maps the prepared rows to log prices, model.predict by default.
+    `domain` of the model is computed if not given.
+    """
+    X, valid = prepare_chunk(chunk, domain or feature_domain(model))
+    predictions = np.full(len(chunk), np.nan)
+    if len(X):
+        predictions[valid] = np.expm1((predict or model.predict)(X))
+    chunk[PREDICTION_COLUMN] = predictions
+    return chunk
+
+
+def score_file(src, dst: str, model, chunksize: int = 50_000, progress=None, predict=None) -> dict:
+    """Score listings file chunk by chunk and append results to dst CSV.
+
+    Only one chunk is held in memory at a time, so files larger than RAM can
+    be scored (an upload in the app is held in memory by streamlit though).
+    `progress` is called with (rows scored, fraction of file read), `predict`
+    is passed on to score_chunk.
+    """
+    start = time.perf_counter()
+    try:
+        total_bytes = os.path.getsize(src) if isinstance(src, (str, os.PathLike)) else src.seek(0, os.SEEK_END)
+        handle = open(src, 'rb') if isinstance(src, (str, os.PathLike)) else src
+        handle.seek(0)
+    except Exception as e:
+        logger.error("Unexpected error occured while opening listings file: %s", e)
+        raise
+
+    rows = 0
+    skipped = 0
+    try:
+        domain = feature_domain(model)
+        reader = pd.read_csv(handle, chunksize=chunksize)
+        for i, chunk in enumerate(reader):
+            if i == 0:
+                validate_columns(chunk.columns)
+            scored = score_chunk(chunk, model, predict, domain)
+            scored.to_csv(dst, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+            rows += len(scored)
+            skipped += int(scored[PREDICTION_COLUMN].isna().sum())
+            if progress is not None:
+                progress(rows, min(handle.tell() / max(total_bytes, 1), 1.0))
+    except Exception as e:
+        logger.error("Unexpected error occured while scoring listings: %s", e)
+        raise
+    finally:
+        if handle is not src:
+            handle.close()
+
+    elapsed = time.perf_counter() - start
+    logger.debug("Scored %d rows (%d skipped) in %.2fs", rows, skipped, elapsed)
+    return {"rows": rows, "skipped": skipped, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a listings CSV with the price model")
+    parser.add_argument("src", help="Listings CSV with the model feature columns, Area in Sq.ft")
+    parser.add_argument("dst", help="Output CSV path")
+    parser.add_argument("--model", default="assets/models", help="Model directory or .pkl/.cbm file")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+
+    model = load_serving_model(args.model)
+    score_file(args.src, args.dst, model, args.chunksize,
+               progress=lambda rows, frac: logger.info("%d rows scored (%.0f%%)", rows, frac * 100))
+
+
+if __name__ == "__main__":
+    main()
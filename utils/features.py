@@ -0,0 +1,10 @@
+# Feature columns expected by model pipeline, in training order
+FEATURE_COLUMNS = ['property_type', 'Sector', 'City', 'Area', 'bedRoom', 'bathroom',
+                   'balcony', 'facing', 'FloorNo', 'FloorRise', 'agePossession',
+                   'Flooring', 'Furnishing', 'CoveredParking',
+                   'OpenParking', 'PowerBackup', 'Facilities Categories']
+
+TARGET_COLUMN = 'price'
+
+CATEGORICAL_COLUMNS = ['property_type', 'Sector', 'City', 'facing', 'FloorRise', 'agePossession',
+                       'Flooring', 'Furnishing', 'PowerBackup', 'Facilities Categories']
@@ -0,0 +1,79 @@
+import threading
+from collections import OrderedDict
+
+from utils.assets import registry
+from utils.instrumentation import count, metrics, timer
+
+
+class FigureCache:
+    """Size bounded LRU cache of plotly figures shared across sessions.
+
+    Entries are sized by their serialized JSON, which is what gets sent to
+    the browser. The built figure is kept next to it so a hit only costs
+    streamlit's own serialization, cached figures must not be mutated.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple):
+        """Get cached figure or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, figure) -> None:
+        """Store figure, evict least recently used figures above max_bytes"""
+        size = len(figure.to_json())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (figure, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and cached bytes"""
+        with self._lock:
+            return {
+                "figures": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by all sessions of the process, counters are exported as gauges
+figure_cache = FigureCache()
+metrics.register_gauges("figure_cache", figure_cache.stats)
+
+
+def cached_figure(page: str, inputs: tuple, assets: tuple, builder):
+    """Get figure for page + widget inputs + versions of the data artifacts it is built from"""
+    key = (page, inputs, tuple(registry.version(path) for path in assets))
+    figure = figure_cache.get(key)
+    if figure is None:
+        count(f"figure_cache_miss:{page}")
+        with timer(f"figure:{page}"):
+            figure = builder()
+        figure_cache.put(key, figure)
+    else:
+        count(f"figure_cache_hit:{page}")
+    return figure
@@ -0,0 +1,40 @@
+from utils.assets import get_asset
+
+SECTOR_GEOMETRY_PATH = 'assets/geojson/sector_geometry.pkl'
+TRICITY_GEOMETRY_PATH = 'assets/geojson/tricity_geometry.pkl'
+
+# Coordinates & Zoom of Geospatial maps: lat, long, zoom
+MAP_PARAMS = {
+    "Tricity": [30.698599, 76.767719, 10.4],
+    "Chandigarh": [30.736744, 76.784830, 11.45],
+    "Mohali": [30.699839, 76.747052, 10.4],
+    "Panchkula": [30.705016, 76.877993, 11.35]
+}
+
+# Home page map of city boundaries
+HOME_MAP_CENTER = {"lat": 30.689281, "lon": 76.786950}
+HOME_MAP_ZOOM = 10.25
+
+
+def pick_level(levels: dict, zoom: float):
+    """Get geometry simplified for zoom, falling back to the closest more detailed level"""
+    if zoom in levels:
+        return levels[zoom]
+    finer = [level for level in levels if level >= zoom]
+    return levels[min(finer)] if finer else levels[max(levels)]
+
+
+def get_sector_geometry(city: str, zoom: float) -> dict:
+    """GeoJSON of sectors in city (or Tricity) simplified for zoom"""
+    geometry = get_asset(SECTOR_GEOMETRY_PATH)
+    return pick_level(geometry["cities"][city], zoom)
+
+
+def get_sector_lookup() -> dict:
+    """Sector id -> {City, index} of features having geometry"""
+    return get_asset(SECTOR_GEOMETRY_PATH)["sector_lookup"]
+
+
+def get_tricity_geometry(zoom: float = HOME_MAP_ZOOM) -> dict:
+    """GeoJSON of city boundaries simplified for zoom"""
+    return pick_level(get_asset(TRICITY_GEOMETRY_PATH), zoom)
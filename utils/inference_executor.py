@@ -0,0 +1,111 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+from utils.instrumentation import count, metrics
+from utils.logger import get_logger
+
+logger = get_logger('inference_executor')
+
+
+class Overloaded(RuntimeError):
+    """Raised when the inference queue is full"""
+
+
+class InferenceExecutor:
+    """Run predictions of all sessions on a fixed set of worker threads.
+
+    Tasks are callables taking the CatBoost thread count they may use, so the
+    process never runs more than workers * threads CatBoost threads. The
+    queue is bounded: when it is full new tasks are rejected right away with
+    Overloaded instead of piling up behind a backlog.
+    """
+
+    def __init__(self, workers: int = 2, threads: int = None, max_queue: int = 64):
+        self.workers = workers
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        for i in range(workers):
+            threading.Thread(target=self._run, name=f"inference-{i}", daemon=True).start()
+
+    def submit(self, task) -> Future:
+        """Queue task(thread_count), raises Overloaded if the queue is full"""
+        future = Future()
+        try:
+            self._queue.put_nowait((task, future))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            count("inference_rejected")
+            raise Overloaded(f"Inference queue is full ({self._queue.maxsize} waiting)")
+        return future
+
+    def run(self, task, timeout: float = 5.0):
+        """Run task and wait for its result, raises Overloaded or TimeoutError"""
+        future = self.submit(task)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # dropped if no worker picked it up yet
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            count("inference_timeout")
+            raise
+
+    def _run(self) -> None:
+        while True:
+            task, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self.in_flight += 1
+            try:
+                future.set_result(task(self.threads))
+            except Exception as e:
+                logger.error("Unexpected error occured while running inference: %s", e)
+                with self._lock:
+                    self.errors += 1
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self.completed += 1
+
+    def stats(self) -> dict:
+        """Worker/thread budget, in-flight and queued task counts and outcome counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "catboost_threads": self.threads,
+                "in_flight": self.in_flight,
+                "queued": self._queue.qsize(),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Process wide executor shared by all sessions, sized from INFERENCE_WORKERS/INFERENCE_THREADS/INFERENCE_QUEUE"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get("INFERENCE_WORKERS", min(2, os.cpu_count() or 1)))
+            threads = int(os.environ.get("INFERENCE_THREADS", 0)) or None
+            _executor = InferenceExecutor(workers, threads, int(os.environ.get("INFERENCE_QUEUE", 64)))
+            metrics.register_gauges("inference", _executor.stats)
+            logger.debug("Inference executor started: %s", _executor.stats())
+    return _executor
@@ -0,0 +1,219 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from utils.features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+from utils.logger import get_logger
+from utils.serving_model import feature_domain, load_serving_model
+
+logger = get_logger('inference_server')
+
+
+def batch_bucket(size: int) -> str:
+    """Histogram bucket (upper bound, powers of 2) for a batch size"""
+    bound = 1
+    while bound < size:
+        bound *= 2
+    return str(bound)
+
+
+class MicroBatcher:
+    """Group concurrent single listing requests into one model.predict call.
+
+    Worker thread waits for the first queued request, then keeps collecting
+    requests until `max_batch_size` is reached or `max_delay` seconds passed.
+    If a batch fails its listings are predicted one by one, so only the
+    request that caused the failure gets the error.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_delay: float = 0.005):
+        self.model = model
+        # categories and numeric columns the model accepts, used to validate requests
+        self.domain = feature_domain(model)
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.failed_requests = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, listing: dict) -> Future:
+        """Queue a listing(Area in Sq.ft) for prediction"""
+        future = Future()
+        self._queue.put((listing, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _predict(self, listings: list) -> np.ndarray:
+        X = pd.DataFrame(listings, columns=FEATURE_COLUMNS)
+        X['Area'] = np.log(X['Area'].astype(float))
+        return np.expm1(self.model.predict(X))
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            failed = 0
+            try:
+                predictions = self._predict([listing for listing, _ in batch])
+                for (_, future), prediction in zip(batch, predictions):
+                    future.set_result(float(prediction))
+            except Exception as e:
+                logger.error("Unexpected error occured while predicting batch, retrying row by row: %s", e)
+                for listing, future in batch:
+                    try:
+                        future.set_result(float(self._predict([listing])[0]))
+                    except Exception as row_error:
+                        failed += 1
+                        future.set_exception(row_error)
+
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.batch_sizes[batch_bucket(len(batch))] += 1
+                self.failed_batches += bool(failed)
+                self.failed_requests += failed
+
+    def stats(self) -> dict:
+        """Queue depth and batch size histogram"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0,
+                "failed_batches": self.failed_batches,
+                "failed_requests": self.failed_requests,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items(), key=lambda item: int(item[0]))),
+            }
+
+
+def validate_listing(listing, domain: tuple = None) -> None:
+    """Check listing has every model feature, string categoricals and a positive Area.
+
+    With the (categories, numeric columns) `domain` of the model, also check
+    numeric fields are numbers and categories are known to the model.
+    """
+    if not isinstance(listing, dict):
+        raise ValueError("Request body must be a JSON object")
+    missing = [col for col in FEATURE_COLUMNS if listing.get(col) is None]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    for col in CATEGORICAL_COLUMNS:
+        if not isinstance(listing[col], str):
+            raise ValueError(f"{col} must be a string")
+    categories, numeric = domain or ({}, ['Area'])
+    for col in numeric:
+        value = listing[col]
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+            raise ValueError(f"{col} must be a number")
+    for col, allowed in categories.items():
+        if listing[col] not in allowed:
+            raise ValueError(f"Unknown {col} {listing[col]!r}, expected one of: "
+                             f"{', '.join(map(str, sorted(allowed, key=str)))}")
+    if listing['Area'] <= 0:
+        raise ValueError("Area must be positive")
+
+
+def make_handler(batcher: MicroBatcher, timeout: float):
+    """Create request handler bound to batcher"""
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send_json(200, batcher.stats())
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                listing = json.loads(self.rfile.read(length))
+                validate_listing(listing, batcher.domain)
+            except (ValueError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+
+            try:
+                price = batcher.submit(listing).result(timeout=timeout)
+            except ValueError as e:
+                # listing the model can't encode
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            self._send_json(200, {"price": price})
+
+        def log_message(self, format, *args):
+            # Default handler writes every request to stderr
+            pass
+
+    return PredictionHandler
+
+
+class PredictionServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for concurrent clients"""
+    request_queue_size = 256
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve price model over HTTP with request micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default="assets/models", help="Model directory or .pkl/.cbm file")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for a prediction")
+    args = parser.parse_args()
+
+    model = load_serving_model(args.model)
+    batcher = MicroBatcher(model, args.max_batch_size, args.max_delay_ms / 1000)
+    server = PredictionServer((args.host, args.port), make_handler(batcher, args.timeout))
+    logger.info("Serving predictions on http://%s:%d (POST /predict, GET /stats)", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import atexit
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from utils.logger import get_logger
+
+logger = get_logger('instrumentation')
+
+# Set APP_METRICS=1 to record timings, otherwise `timed` returns functions unchanged
+# and `timer` is a no-op. Aggregates are exported as Prometheus text on
+# APP_METRICS_PORT (GET /metrics) and/or as JSON lines appended to the rotating
+# file APP_METRICS_FILE every APP_METRICS_INTERVAL seconds and at exit.
+ENABLED = os.environ.get("APP_METRICS", "") not in ("", "0")
+PREFIX = "real_estate"
+
+
+class Metrics:
+    """Thread safe aggregates of timings (count, sum, max) and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}
+        self.counters = {}
+        self.gauge_sources = {}
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one timing"""
+        with self._lock:
+            count, total, peak = self.timers.get(name, (0, 0.0, 0.0))
+            self.timers[name] = (count + 1, total + seconds, max(peak, seconds))
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Increase counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def register_gauges(self, name: str, source) -> None:
+        """Report numeric values of dict returned by source() as gauges prefixed by name"""
+        with self._lock:
+            self.gauge_sources[name] = source
+
+    def snapshot(self) -> dict:
+        """Current timers, counters, registered gauges and memory gauges"""
+        with self._lock:
+            timers = {name: {"count": count, "sum_s": total, "max_s": peak}
+                      for name, (count, total, peak) in self.timers.items()}
+            counters = dict(self.counters)
+            sources = dict(self.gauge_sources)
+        gauges = {f"{name}_{key}": value for name, source in sources.items()
+                  for key, value in source().items() if isinstance(value, (int, float))}
+        return {"time": time.time(), "timers": timers, "counters": counters, "gauges": gauges,
+                "memory": memory_snapshot()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+
+# Shared by the whole process
+metrics = Metrics()
+
+
+def memory_snapshot() -> dict:
+    """Resident and peak resident memory of the process plus memory held by loaded assets"""
+    memory = {}
+    try:
+        with open("/proc/self/statm") as file:
+            memory["resident_bytes"] = int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss is in KB on Linux
+        memory["peak_resident_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    from utils.assets import asset_stats
+    memory["asset_bytes"] = int(sum(asset["memory_mb"] for asset in asset_stats()) * 2**20)
+    return memory
+
+
+def timed(name: str = None):
+    """Decorator recording call time of function under name (default qualified function name)"""
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+        metric = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(metric, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _timer(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(name, time.perf_counter() - start)
+
+
+def timer(name: str):
+    """Context manager recording time of block under name"""
+    return _timer(name) if ENABLED else _NULL_TIMER
+
+
+def count(name: str, value: int = 1) -> None:
+    """Increase counter if instrumentation is enabled"""
+    if ENABLED:
+        metrics.increment(name, value)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def to_prometheus(snapshot: dict) -> str:
+    """Render snapshot in Prometheus text exposition format"""
+    timers = sorted(snapshot["timers"].items())
+    lines = [f"# TYPE {PREFIX}_duration_seconds summary"]
+    for name, timer_stats in timers:
+        label = f'{{name="{_label(name)}"}}'
+        lines += [f"{PREFIX}_duration_seconds_count{label} {timer_stats['count']}",
+                  f"{PREFIX}_duration_seconds_sum{label} {timer_stats['sum_s']}"]
+    lines.append(f"# TYPE {PREFIX}_duration_seconds_max gauge")
+    for name, timer_stats in timers:
+        lines.append(f'{PREFIX}_duration_seconds_max{{name="{_label(name)}"}} {timer_stats["max_s"]}')
+    lines.append(f"# TYPE {PREFIX}_events_total counter")
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f'{PREFIX}_events_total{{name="{_label(name)}"}} {value}')
+    for name, value in sorted(snapshot["gauges"].items()):
+        lines += [f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {value}"]
+    for name, value in sorted(snapshot["memory"].items()):
+        lines += [f"# TYPE {PREFIX}_memory_{name} gauge", f"{PREFIX}_memory_{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = to_prometheus(metrics.snapshot()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _file_logger(path: str, max_bytes: int, backups: int) -> logging.Logger:
+    """Logger writing one JSON snapshot per line to a rotating file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    file_logger = logging.getLogger("instrumentation.export")
+    file_logger.propagate = False
+    file_logger.setLevel("INFO")
+    if not file_logger.handlers:
+        file_logger.addHandler(RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups))
+    return file_logger
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def start_exporters() -> None:
+    """Start configured exporters once per process"""
+    global _started
+    with _start_lock:
+        if _started or not ENABLED:
+            return
+        _started = True
+
+    port = os.environ.get("APP_METRICS_PORT")
+    if port:
+        try:
+            server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.debug("Serving metrics on port %s (GET /metrics)", port)
+        except OSError as e:
+            logger.error("Could not start metrics endpoint on port %s: %s", port, e)
+
+    path = os.environ.get("APP_METRICS_FILE")
+    if path:
+        file_logger = _file_logger(path, max_bytes=10 * 2**20, backups=5)
+        interval = float(os.environ.get("APP_METRICS_INTERVAL", "60"))
+
+        def write_snapshot():
+            file_logger.info(json.dumps(metrics.snapshot()))
+
+        def export_loop():
+            while True:
+                time.sleep(interval)
+                write_snapshot()
+
+        threading.Thread(target=export_loop, name="metrics-file", daemon=True).start()
+        atexit.register(write_snapshot)
+        logger.debug("Writing metrics to %s every %.0fs", path, interval)
+
+
+start_exporters()
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def scott_bandwidth(std: float, n: int) -> float:
+    """Gaussian kernel bandwidth by Scott's rule (same default as scipy/seaborn)"""
+    return std * n ** (-1 / 5)
+
+
+def binned_kde(counts: np.ndarray, edges: np.ndarray, bandwidth: float) -> np.ndarray:
+    """Gaussian KDE evaluated on bin centers of a fixed width histogram.
+
+    Convolving bin counts with the sampled kernel through FFT costs
+    O(bins log bins), independent of the number of observations.
+    """
+    counts = np.asarray(counts, dtype=float)
+    n = counts.sum()
+    if n == 0 or bandwidth <= 0:
+        return np.zeros_like(counts)
+
+    dx = edges[1] - edges[0]
+    half_width = int(np.ceil(4 * bandwidth / dx))
+    offsets = np.arange(-half_width, half_width + 1) * dx
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+
+    size = len(counts) + len(kernel) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    smoothed = np.fft.irfft(np.fft.rfft(counts, fft_size) * np.fft.rfft(kernel, fft_size), fft_size)
+    smoothed = smoothed[half_width:half_width + len(counts)]
+
+    density = smoothed / (n * bandwidth * np.sqrt(2 * np.pi))
+    # FFT round-off can give tiny negative values
+    return np.clip(density, 0, None)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from utils.assets import registry
+
+# Compact listings frame built by the listings DVC stage, only columns used by pages,
+# served memory mapped from the Arrow file written by the arrow_assets stage
+LISTINGS_PICKLE_PATH = 'assets/bin/listings.pkl'
+LISTINGS_PATH = 'assets/bin/listings.arrow'
+LISTING_COLUMNS = ['City', 'Sector', 'property_type', 'bedRoom', 'bathroom', 'facing', 'Flooring', 'Area', 'price']
+
+EMPTY = np.array([], dtype=np.intp)
+
+
+class ListingIndex:
+    """Row positions and widget options of listings frame, built once per loaded frame.
+
+    Filters slice the frame by precomputed positions instead of scanning
+    every row with boolean masks on each rerun.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.by_city = df.groupby('City', sort=False, observed=True).indices
+        self.by_type = df.groupby('property_type', sort=False, observed=True).indices
+        self.by_city_type = df.groupby(['City', 'property_type'], sort=False, observed=True).indices
+
+        # Cached widget options
+        sectors = df['Sector'].to_numpy()
+        self.sectors_by_city = {
+            city: pd.unique(sectors[positions]).tolist() for city, positions in self.by_city.items()
+        }
+        self.bedrooms = sorted(df['bedRoom'].unique().tolist())
+        self.bathrooms = sorted(df['bathroom'].unique().tolist())
+        self.facing = sorted(df['facing'].unique().tolist())
+        self.flooring = df['Flooring'].value_counts().index.tolist()
+
+    def take(self, positions: np.ndarray) -> pd.DataFrame:
+        """Rows of frame at positions"""
+        return self.df.iloc[positions]
+
+    def city(self, city: str) -> pd.DataFrame:
+        return self.take(self.by_city.get(city, EMPTY))
+
+    def property_type(self, property_type: str) -> pd.DataFrame:
+        return self.take(self.by_type.get(property_type, EMPTY))
+
+    def city_type(self, city: str, property_type: str) -> pd.DataFrame:
+        return self.take(self.by_city_type.get((city, property_type), EMPTY))
+
+
+def get_listing_index(path: str) -> ListingIndex:
+    """Get index of listings frame, built once per version of the artifact"""
+    return registry.derived(path, "listing_index", ListingIndex)
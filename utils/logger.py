@@ -0,0 +1,26 @@
+import logging
+import os
+
+
+def get_logger(name: str, log_dir: str = "logs") -> logging.Logger:
+    """Create logger with console output and error log file"""
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        # Streamlit reruns re-import pages, avoid duplicate handlers
+        return logger
+    logger.setLevel('DEBUG')
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel('DEBUG')
+
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(os.path.join(log_dir, f"{name}_errors.log"))
+    file_handler.setLevel('ERROR')
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    file_handler.setFormatter(formatter)
+
+    logger.addHandler(console_handler)
+    logger.addHandler(file_handler)
+    return logger
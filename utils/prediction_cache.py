@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.instrumentation import metrics
+
+
+def normalize_features(features: tuple) -> tuple:
+    """Convert feature values to hashable python values so equal inputs give equal keys"""
+    normalized = []
+    for value in features:
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float):
+            # log(area) is recomputed on every rerun, avoid float noise in keys
+            value = round(value, 9)
+        normalized.append(value)
+    return tuple(normalized)
+
+
+class PredictionCache:
+    """Bounded LRU cache with TTL for predictions, shared across sessions.
+
+    Entries belong to a model version, whenever a different version is
+    passed in the whole cache is dropped.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version) -> None:
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: tuple, version):
+        """Get cached prediction or None"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, created = entry
+            if time.monotonic() - created > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, version, value) -> None:
+        """Store prediction, evict least recently used entries above max size"""
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, features: tuple, version, compute):
+        """Return cached prediction for features or compute and store it"""
+        key = normalize_features(features)
+        value = self.get(key, version)
+        if value is None:
+            value = compute()
+            self.put(key, version, value)
+        return value
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by all sessions of the process, counters are exported as gauges
+prediction_cache = PredictionCache()
+metrics.register_gauges("prediction_cache", prediction_cache.stats)
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Scatter plots of more rows than SCATTER_MAX_POINTS are downsampled on the
+# server, at most SCATTER_MAX_OUTLIERS of those points are outliers
+MAX_POINTS = int(os.environ.get("SCATTER_MAX_POINTS", 5000))
+MAX_OUTLIERS = int(os.environ.get("SCATTER_MAX_OUTLIERS", 500))
+# Cells per axis of the density grid and of the grid sampling is stratified on
+GRID_BINS = 64
+SAMPLE_BINS = 32
+
+
+def log_values(df: pd.DataFrame, col: str) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(df[col].to_numpy(dtype=float))
+
+
+def tukey_distance(values: np.ndarray) -> np.ndarray:
+    """Distance of every value outside the Tukey fences (1.5 IQR) in IQRs, 0 inside or not finite"""
+    finite = np.isfinite(values)
+    if finite.sum() < 4:
+        return np.zeros(len(values))
+    q1, q3 = np.percentile(values[finite], [25, 75])
+    iqr = max(q3 - q1, 1e-12)
+    with np.errstate(invalid='ignore'):
+        distance = np.maximum(q1 - 1.5 * iqr - values, values - q3 - 1.5 * iqr) / iqr
+    return np.where(finite & (distance > 0), distance, 0)
+
+
+def outlier_scores(df: pd.DataFrame, x: str, y: str) -> np.ndarray:
+    """Largest Tukey distance of every row on log x, log y and log y/x.
+
+    With Area and price that flags very large or expensive listings as well
+    as unusually cheap or expensive price per sqft.
+    """
+    log_x, log_y = log_values(df, x), log_values(df, y)
+    return np.maximum.reduce([tukey_distance(log_x), tukey_distance(log_y), tukey_distance(log_y - log_x)])
+
+
+def top_outliers(scores: np.ndarray, max_outliers: int) -> np.ndarray:
+    """Positions of rows with positive score, most extreme first, at most max_outliers"""
+    positions = np.flatnonzero(scores > 0)
+    return positions[np.argsort(-scores[positions], kind='stable')][:max_outliers]
+
+
+def grid_cells(df: pd.DataFrame, x: str, y: str, bins: int) -> np.ndarray:
+    """Cell id of every row on a bins x bins grid over log x and log y"""
+    cells = np.zeros(len(df), dtype=np.int64)
+    for values in (log_values(df, x), log_values(df, y)):
+        values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+        edges = np.linspace(values.min(), values.max(), bins + 1)[1:-1]
+        cells = cells * bins + np.searchsorted(edges, values, side='right')
+    return cells
+
+
+def density_sample(cells: np.ndarray, n: int, seed: int = 0) -> np.ndarray:
+    """Sorted positions of n rows (or fewer if there are not as many) keeping the share of rows per cell.
+
+    Every non-empty cell keeps at least one row so sparse regions do not
+    disappear, the rest of the budget is split in proportion to cell counts.
+    """
+    if n <= 0 or len(cells) == 0:
+        return np.array([], dtype=np.intp)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(cells))
+    order = order[np.argsort(cells[order], kind='stable')]
+    sorted_cells = cells[order]
+
+    occupied, starts, counts = np.unique(sorted_cells, return_index=True, return_counts=True)
+    if len(occupied) >= n:
+        # more cells than budget, one row of n random cells
+        return np.sort(order[rng.choice(starts, n, replace=False)])
+    share = counts / counts.sum() * (n - len(occupied))
+    quota = 1 + np.floor(share).astype(np.int64)
+    # rows lost to rounding go to cells with rows left, largest remainders first
+    by_remainder = np.argsort(np.floor(share) - share, kind='stable')
+    left = n - quota.sum()
+    while left > 0:
+        open_cells = by_remainder[quota[by_remainder] < counts[by_remainder]][:left]
+        if len(open_cells) == 0:
+            break
+        quota[open_cells] += 1
+        left -= len(open_cells)
+
+    # rank of each row inside its cell, rows are in random order within cells
+    cell_index = np.repeat(np.arange(len(occupied)), counts)
+    rank = np.arange(len(cells)) - starts[cell_index]
+    return np.sort(order[rank < quota[cell_index]])
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int = MAX_POINTS,
+               max_outliers: int = MAX_OUTLIERS, bins: int = SAMPLE_BINS, seed: int = 0) -> tuple:
+    """Rows to plot of a scatter of df, returns (rows, number of outliers among them).
+
+    Frames up to max_points rows are returned whole. Larger ones keep the
+    strongest outliers plus a density preserving sample of the remaining
+    rows, max_points rows in total.
+    """
+    if len(df) <= max_points:
+        return df, 0
+    outliers = top_outliers(outlier_scores(df, x, y), min(max_outliers, max_points))
+    rest = np.setdiff1d(np.arange(len(df)), outliers, assume_unique=True)
+    sample = rest[density_sample(grid_cells(df.iloc[rest], x, y, bins), max_points - len(outliers), seed)]
+    return df.iloc[np.sort(np.concatenate([outliers, sample]))], len(outliers)
+
+
+def density_grid(df: pd.DataFrame, x: str, y: str, bins: int = GRID_BINS,
+                 max_outliers: int = MAX_OUTLIERS) -> tuple:
+    """Row counts on a bins x bins grid plus outlier rows drawn on top of it.
+
+    The grid only spans rows inside the Tukey fences of log x and log y so
+    a few extreme listings do not squeeze everyone else into a couple of
+    cells, those are drawn as outliers. Returns (counts[y, x], x bin centers, y bin centers, outlier rows).
+    """
+    inside = (tukey_distance(log_values(df, x)) == 0) & (tukey_distance(log_values(df, y)) == 0)
+    x_values, y_values = df[x].to_numpy(dtype=float), df[y].to_numpy(dtype=float)
+    counts, x_edges, y_edges = np.histogram2d(x_values[inside], y_values[inside], bins=bins)
+    outliers = df.iloc[np.sort(top_outliers(outlier_scores(df, x, y), max_outliers))]
+    return counts.T, (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, outliers
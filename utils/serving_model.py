@@ -0,0 +1,215 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.assets import get_asset, load_pickle, registry
+from utils.logger import get_logger
+
+logger = get_logger('serving_model')
+
+MODEL_FILE = "model.cbm"
+SPEC_FILE = "preprocessing.json"
+PICKLE_FILE = "model.pkl"
+SPEC_VERSION = 1
+
+
+def _to_python(value):
+    """Convert numpy scalars in category tables to JSON serializable values"""
+    return value.item() if hasattr(value, "item") else value
+
+
+def extract_preprocessing(pipeline) -> dict:
+    """Extract ordinal category tables and scaler parameters from fitted pipeline.
+
+    Columns are listed in the order ColumnTransformer outputs them, which is
+    the order StandardScaler and CatBoost see them.
+    """
+    encoding = pipeline.named_steps['encoding']
+    scaler = pipeline.named_steps['scaler']
+    feature_names = list(encoding.feature_names_in_)
+
+    columns = []
+    for _, transformer, cols in encoding.transformers_:
+        if transformer == 'drop':
+            continue
+        if transformer == 'passthrough':
+            for col in cols:
+                name = feature_names[col] if isinstance(col, (int, np.integer)) else col
+                columns.append({"name": name, "type": "numeric"})
+            continue
+        unknown_value = transformer.unknown_value if transformer.handle_unknown == 'use_encoded_value' else None
+        for col, categories in zip(cols, transformer.categories_):
+            columns.append({
+                "name": col,
+                "type": "categorical",
+                "categories": [_to_python(category) for category in categories],
+                "unknown_value": unknown_value,
+            })
+
+    return {
+        "version": SPEC_VERSION,
+        "feature_columns": feature_names,
+        "columns": columns,
+        "mean": np.asarray(scaler.mean_, dtype=float).tolist(),
+        "scale": np.asarray(scaler.scale_, dtype=float).tolist(),
+    }
+
+
+def feature_domain(model) -> tuple:
+    """Categories of columns whose encoder rejects unknown values, and numeric columns, of pipeline or CompactModel.
+
+    Returns ({column: set of categories}, [numeric columns]), a listing with
+    any other value in those columns can't be predicted.
+    """
+    spec = model.spec if hasattr(model, 'spec') else extract_preprocessing(model)
+    strict = {col["name"]: set(col["categories"]) for col in spec["columns"]
+              if col["type"] == "categorical" and col.get("unknown_value") is None}
+    numeric = [col["name"] for col in spec["columns"] if col["type"] == "numeric"]
+    return strict, numeric
+
+
+def export_serving_model(pipeline, model_dir: str) -> None:
+    """Write CatBoost model in native format and preprocessing tables as JSON"""
+    try:
+        spec = extract_preprocessing(pipeline)
+        pipeline.named_steps['cat_boost'].save_model(os.path.join(model_dir, MODEL_FILE))
+        with open(os.path.join(model_dir, SPEC_FILE), 'w') as file:
+            json.dump(spec, file, indent=2)
+        logger.debug("Serving model exported to %s", model_dir)
+    except Exception as e:
+        logger.error("Unexpected error occured while exporting serving model: %s", e)
+        raise
+
+
+class CompactModel:
+    """Pipeline replacement which reproduces encoding and scaling with NumPy.
+
+    Loads only CatBoost and a JSON file, so serving doesn't depend on the
+    scikit-learn version the pipeline was pickled with.
+    """
+
+    def __init__(self, booster, spec: dict):
+        if spec.get("version") != SPEC_VERSION:
+            raise ValueError(f"Unsupported preprocessing spec version: {spec.get('version')}")
+        self.booster = booster
+        self.spec = spec
+        self.feature_columns = spec["feature_columns"]
+        self.columns = spec["columns"]
+        self.mean = np.asarray(spec["mean"], dtype=float)
+        self.scale = np.asarray(spec["scale"], dtype=float)
+        # category -> ordinal code lookup per categorical column
+        self.tables = {
+            col["name"]: {category: float(code) for code, category in enumerate(col["categories"])}
+            for col in self.columns if col["type"] == "categorical"
+        }
+        # per output column: position in feature_columns, code table (None if numeric), unknown code
+        self._row_plan = [
+            (self.feature_columns.index(col["name"]), self.tables.get(col["name"]), col.get("unknown_value"))
+            for col in self.columns
+        ]
+
+    @classmethod
+    def from_pipeline(cls, pipeline) -> "CompactModel":
+        """Build from fitted pipeline, sharing its CatBoost model"""
+        return cls(pipeline.named_steps['cat_boost'], extract_preprocessing(pipeline))
+
+    @classmethod
+    def load(cls, model_dir: str) -> "CompactModel":
+        """Load exported CatBoost model and preprocessing spec"""
+        try:
+            # deferred, catboost import is the slowest part of loading the page
+            from catboost import CatBoostRegressor
+            booster = CatBoostRegressor()
+            booster.load_model(os.path.join(model_dir, MODEL_FILE))
+            with open(os.path.join(model_dir, SPEC_FILE), 'r') as file:
+                spec = json.load(file)
+        except Exception as e:
+            logger.error("Unexpected error occured while loading serving model: %s", e)
+            raise
+        return cls(booster, spec)
+
+    def transform(self, X: pd.DataFrame) -> np.ndarray:
+        """Encode and scale DataFrame like the fitted ColumnTransformer + StandardScaler"""
+        encoded = np.empty((len(X), len(self.columns)), dtype=float)
+        for i, col in enumerate(self.columns):
+            name = col["name"]
+            if col["type"] == "numeric":
+                encoded[:, i] = X[name].to_numpy(dtype=float)
+                continue
+            codes = X[name].map(self.tables[name])
+            unknown = codes.isna().to_numpy()
+            if unknown.any():
+                if col["unknown_value"] is None:
+                    raise ValueError(f"Found unknown categories {X[name][unknown].unique().tolist()} "
+                                     f"in column {name}")
+                codes = codes.fillna(col["unknown_value"])
+            encoded[:, i] = codes.to_numpy(dtype=float)
+        return (encoded - self.mean) / self.scale
+
+    def predict(self, X: pd.DataFrame, thread_count: int = -1) -> np.ndarray:
+        """Predict log price like Pipeline.predict"""
+        return self.booster.predict(self.transform(X), thread_count=thread_count)
+
+    def transform_one(self, features) -> np.ndarray:
+        """Encode and scale one listing into a 1 row array without building a DataFrame.
+
+        `features` is a dict keyed by feature column or a sequence in
+        FEATURE_COLUMNS order.
+        """
+        if isinstance(features, dict):
+            features = [features[name] for name in self.feature_columns]
+        out = np.empty((1, len(self._row_plan)), dtype=float)
+        row = out[0]
+        for i, (position, table, unknown_value) in enumerate(self._row_plan):
+            value = features[position]
+            if table is None:
+                row[i] = value
+                continue
+            code = table.get(value)
+            if code is None:
+                if unknown_value is None:
+                    raise ValueError(f"Found unknown categories [{value!r}] in column {self.columns[i]['name']}")
+                code = unknown_value
+            row[i] = code
+        row -= self.mean
+        row /= self.scale
+        return out
+
+    def predict_one(self, features, thread_count: int = -1) -> float:
+        """Predict log price of one listing given as dict or FEATURE_COLUMNS ordered sequence"""
+        # a flat list is predicted as a single object, cheaper than a 1 row matrix
+        return float(self.booster.predict(self.transform_one(features)[0].tolist(), thread_count=thread_count))
+
+
+def load_serving_model(path: str):
+    """Load compact serving model if exported, otherwise the pickled pipeline.
+
+    `path` may be a model directory, a `.cbm` file or a `.pkl` file.
+    """
+    if path.endswith(".pkl"):
+        return load_pickle(path)
+    model_dir = os.path.dirname(path) if path.endswith(".cbm") else path
+    if os.path.exists(os.path.join(model_dir, MODEL_FILE)) and os.path.exists(os.path.join(model_dir, SPEC_FILE)):
+        return CompactModel.load(model_dir)
+    logger.debug("No compact model in %s, loading pickled pipeline", model_dir)
+    return load_pickle(os.path.join(model_dir, PICKLE_FILE))
+
+
+def serving_model_path(model_dir: str) -> str:
+    """Path of the artifact the serving model is loaded from"""
+    compact_path = os.path.join(model_dir, MODEL_FILE)
+    if os.path.exists(compact_path) and os.path.exists(os.path.join(model_dir, SPEC_FILE)):
+        return compact_path
+    return os.path.join(model_dir, PICKLE_FILE)
+
+
+def get_serving_model(model_dir: str):
+    """Get serving model from process wide asset registry"""
+    return get_asset(serving_model_path(model_dir), loader=load_serving_model)
+
+
+def serving_model_version(model_dir: str) -> str:
+    """Content hash of the loaded serving model"""
+    return registry.version(serving_model_path(model_dir))
@@ -0,0 +1,86 @@
+import importlib
+import threading
+import time
+
+import pandas as pd
+
+from utils.analytics_cube import get_analytics_cube
+from utils.geometry import get_sector_geometry, get_tricity_geometry
+from utils.inference_executor import get_inference_executor
+from utils.instrumentation import timer
+from utils.listing_index import LISTINGS_PATH, get_listing_index
+from utils.logger import get_logger
+from utils.serving_model import extract_preprocessing, get_serving_model
+
+logger = get_logger('warmup')
+
+MODEL_DIR = 'assets/models'
+
+# Modules that are only imported once a page needs them: catboost by the model, plotly.express by
+# figure builders (streamlit itself already imports plotly.graph_objects)
+HEAVY_MODULES = ['catboost', 'plotly.express']
+
+
+def dummy_listing(model) -> pd.DataFrame:
+    """One row listing with the first known category and zeros, valid for the model"""
+    spec = model.spec if hasattr(model, 'spec') else extract_preprocessing(model)
+    row = {col['name']: col['categories'][0] if col['type'] == 'categorical' else 0.0 for col in spec['columns']}
+    return pd.DataFrame([row], columns=spec['feature_columns'])
+
+
+def warm_up(model_dir: str = MODEL_DIR) -> dict:
+    """Import heavy modules, load model and page assets and run one prediction, returns seconds per step"""
+    def step(name: str, fn):
+        start = time.perf_counter()
+        with timer(f"warmup:{name}"):
+            fn()
+        report[name] = time.perf_counter() - start
+
+    report = {}
+    for module in HEAVY_MODULES:
+        step(f"import {module}", lambda: importlib.import_module(module))
+
+    model = None
+
+    def load_model():
+        nonlocal model
+        model = get_serving_model(model_dir)
+
+    step("model", load_model)
+    # through the shared executor like page predictions, which also starts its workers
+    step("predict", lambda: get_inference_executor().run(
+        lambda threads: model.predict(dummy_listing(model), thread_count=threads), timeout=None))
+    step("listing index", lambda: get_listing_index(LISTINGS_PATH))
+    step("analytics cube", get_analytics_cube)
+    step("geometry", lambda: (get_tricity_geometry(), get_sector_geometry("Tricity", 0)))
+    return report
+
+
+_report = {}
+_thread = None
+_lock = threading.Lock()
+
+
+def _run(model_dir: str) -> None:
+    start = time.perf_counter()
+    try:
+        _report.update(warm_up(model_dir))
+        logger.debug("Warm-up done in %.2fs: %s", time.perf_counter() - start,
+                     ", ".join(f"{name} {seconds:.3f}s" for name, seconds in _report.items()))
+    except Exception as e:
+        logger.error("Warm-up failed: %s", e)
+
+
+def start_warmup(model_dir: str = MODEL_DIR) -> threading.Thread:
+    """Start warm-up in a background thread once per process"""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(model_dir,), name="warmup", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def warmup_report() -> dict:
+    """Seconds spent per warm-up step (imports, model, assets) so far"""
+    return dict(_report)